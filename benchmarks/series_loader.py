@@ -0,0 +1,103 @@
+'''
+Time series loader benchmark: read_sql + strftime round trip against the binary COPY reader.
+
+    python benchmarks/series_loader.py                  # synthetic series (no database)
+    python benchmarks/series_loader.py --comid 9007721  # hs_{comid} of the database (.env)
+'''
+import argparse
+import datetime as dt
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tethysapp.historical_validation_tool_colombia import timeseries
+
+
+def best_of(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def round_trip(rows):
+    '''Loader used before: rows as the driver returns them, strftime and parse again'''
+    data = pd.DataFrame.from_records(rows, columns=['datetime', 'value'])
+    data.index = data.datetime
+    data = data.drop(columns=['datetime'])
+    data.index = pd.to_datetime(data.index)
+    data.index = data.index.to_series().dt.strftime("%Y-%m-%d %H:%M:%S")
+    data.index = pd.to_datetime(data.index)
+    return data
+
+
+def copy_reader(stream, chunk_rows):
+    reader = timeseries.BinaryCopyReader(['value'], chunk_rows=chunk_rows)
+    for start in range(0, len(stream), 1 << 16):
+        reader.write(stream[start:start + (1 << 16)])
+    return reader.result()
+
+
+def synthetic(rows, repeat, chunk_rows):
+    start = dt.datetime(1981, 1, 1)
+    dates = [start + dt.timedelta(days=day) for day in range(rows)]
+    values = np.random.default_rng(0).gamma(2.0, 50.0, rows)
+    records = list(zip(dates, values.tolist()))
+
+    microseconds = (pd.DatetimeIndex(dates) - pd.Timestamp('2000-01-01')) // pd.Timedelta(microseconds=1)
+    stream = bytearray(timeseries.COPY_HEADER.pack(timeseries.COPY_SIGNATURE, 0, 0))
+    for date, value in zip(microseconds.tolist(), values.tolist()):
+        stream += struct.pack('>hiqid', 2, 8, date, 8, value)
+    stream = bytes(stream + timeseries.COPY_TRAILER)
+
+    before = best_of(lambda: round_trip(records), repeat)
+    after = best_of(lambda: copy_reader(stream, chunk_rows), repeat)
+    assert round_trip(records).index.equals(copy_reader(stream, chunk_rows).index)
+    return before, after
+
+
+def database(comid, repeat, chunk_rows):
+    from tethysapp.historical_validation_tool_colombia import database
+
+    statement = database.historical_simulation_statement(comid)
+    with database.get_engine().connect() as conn:
+        def before():
+            data = database.read_sql('hs', statement, conn=conn).set_index('datetime')
+            data.index = pd.to_datetime(data.index)
+            data.index = data.index.to_series().dt.strftime("%Y-%m-%d %H:%M:%S")
+            data.index = pd.to_datetime(data.index)
+            return data
+
+        def after():
+            return database.read_series('hs', statement, conn=conn, chunk_rows=chunk_rows)
+
+        assert before().index.equals(after().index)
+        return best_of(before, repeat), best_of(after, repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=15000, help='Rows of the synthetic series.')
+    parser.add_argument('--comid', default=None, help='Read hs_{comid} of the database instead.')
+    parser.add_argument('--chunk-rows', type=int, default=None, help='Rows decoded at once by the COPY reader.')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.comid:
+        before, after = database(args.comid, args.repeat, args.chunk_rows)
+    else:
+        before, after = synthetic(args.rows, args.repeat, args.chunk_rows)
+    print('read_sql + strftime: {0:8.2f} ms'.format(before * 1000))
+    print('binary COPY:         {0:8.2f} ms'.format(after * 1000))
+    print('speedup:             {0:8.1f}x'.format(before / after))
+
+
+if __name__ == '__main__':
+    main()
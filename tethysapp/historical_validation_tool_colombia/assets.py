@@ -0,0 +1,230 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+import os
+import json
+import gzip
+import hashlib
+import threading
+
+# Brotli is optional, without it only the gzip variants are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .cache import APP_WORKSPACE
+from . import geometry
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Precompressed files with content-hash names (environment variable)
+ASSETS_DIR = os.getenv('ASSETS_DIR', os.path.join(APP_WORKSPACE, 'assets'))
+MANIFEST_FILE = 'manifest.json'
+
+# Folders of the files served as assets (logical name: <root>/<path in the folder>)
+ASSET_ROOTS = {
+    'geojson': geometry.SOURCE_DIR,
+    'geometry': geometry.GEOMETRY_DIR,
+}
+
+# Content encodings in order of preference and file suffix of every variant
+ENCODINGS = {'br': '.br', 'gzip': '.gz', 'identity': ''}
+
+# Cache-Control of the files with content-hash names
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+
+####################################################################################################
+##                                       BUILD THE ASSETS                                         ##
+####################################################################################################
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def logical_name(path, roots=ASSET_ROOTS):
+    '''Logical name of a file inside one of the asset roots (None for other files)'''
+    path = os.path.abspath(path)
+    for root, folder in roots.items():
+        folder = os.path.abspath(folder)
+        if os.path.commonpath([path, folder]) == folder:
+            return '/'.join([root] + os.path.relpath(path, folder).split(os.sep))
+    return None
+
+
+def list_sources(roots=ASSET_ROOTS):
+    '''Files of the asset roots as (logical name, path)'''
+    sources = []
+    for root, folder in roots.items():
+        for dirpath, _, filenames in os.walk(folder):
+            for filename in sorted(filenames):
+                if filename.endswith(('.json', '.geojson')):
+                    path = os.path.join(dirpath, filename)
+                    sources.append((logical_name(path, roots), path))
+    return sorted(sources)
+
+
+def _write(path, data):
+    tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build_asset(name, path, assets_dir=ASSETS_DIR):
+    '''
+    Write the identity, gzip and brotli variants of a file with its content hash in the name
+    (the variants of a hash are never rewritten). Returns the manifest entry of the file.
+    '''
+    with open(path, 'rb') as f:
+        data = f.read()
+    stat = os.stat(path)
+    digest = content_hash(data)
+    folder, filename = name.rsplit('/', 1)
+    stem, extension = os.path.splitext(filename)
+    hashed = '{0}/{1}.{2}{3}'.format(folder, stem, digest, extension)
+
+    variants = {'identity': data, 'gzip': None, 'br': None}
+    if brotli is None:
+        del variants['br']
+    sizes = {}
+    for encoding in variants:
+        output = os.path.join(assets_dir, *(hashed + ENCODINGS[encoding]).split('/'))
+        if not os.path.isfile(output):
+            if encoding == 'gzip':
+                variants[encoding] = gzip.compress(data, compresslevel=9, mtime=0)
+            elif encoding == 'br':
+                variants[encoding] = brotli.compress(data, quality=11)
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            _write(output, variants[encoding])
+        sizes[encoding] = os.path.getsize(output)
+
+    return {'name': hashed, 'hash': digest, 'encodings': sizes,
+            'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def write_manifest(entries, assets_dir=ASSETS_DIR, prune=True):
+    '''Write the manifest ({logical name: entry}) and delete the variants it does not use'''
+    os.makedirs(assets_dir, exist_ok=True)
+    _write(os.path.join(assets_dir, MANIFEST_FILE),
+           json.dumps(entries, indent=1, sort_keys=True).encode('utf-8'))
+    removed = 0
+    if prune:
+        used = {os.path.join(assets_dir, *(entry['name'] + ENCODINGS[encoding]).split('/'))
+                for entry in entries.values() for encoding in entry['encodings']}
+        for dirpath, _, filenames in os.walk(assets_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if filename != MANIFEST_FILE and path not in used:
+                    os.remove(path)
+                    removed += 1
+    return removed
+
+
+
+####################################################################################################
+##                                       SERVE THE ASSETS                                         ##
+####################################################################################################
+
+class AssetManifest:
+    '''
+    Manifest of the built assets, read again when the file changes. Only the entries of files
+    that did not change since the build are used (the others are served from the source).
+    '''
+
+    def __init__(self, assets_dir=ASSETS_DIR, roots=ASSET_ROOTS):
+        self.assets_dir = assets_dir
+        self.roots = roots
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._entries = {}
+        self._by_name = {}
+
+    def _load(self):
+        path = os.path.join(self.assets_dir, MANIFEST_FILE)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime != self._mtime:
+                entries = {}
+                if mtime is not None:
+                    with open(path, encoding='utf-8') as f:
+                        entries = json.load(f)
+                self._entries = entries
+                self._by_name = {entry['name']: entry for entry in entries.values()}
+                self._mtime = mtime
+            return self._entries, self._by_name
+
+    def hashed_name(self, path):
+        '''Content-hash name of a source file (None if it was not built or it changed)'''
+        name = logical_name(path, self.roots)
+        entry = self._load()[0].get(name)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if stat.st_size != entry['size'] or stat.st_mtime != entry['mtime']:
+            return None
+        return entry['name']
+
+    def get(self, hashed_name):
+        '''Manifest entry of a content-hash name (None for unknown names)'''
+        return self._load()[1].get(hashed_name)
+
+    def variant_path(self, entry, encoding):
+        return os.path.join(self.assets_dir, *(entry['name'] + ENCODINGS[encoding]).split('/'))
+
+
+def parse_accept_encoding(header):
+    '''Quality of every coding of an Accept-Encoding header ({coding: q})'''
+    qualities = {}
+    for item in (header or '').split(','):
+        parts = [part.strip() for part in item.split(';')]
+        if not parts[0]:
+            continue
+        quality = 1.0
+        for parameter in parts[1:]:
+            if parameter.startswith('q='):
+                try:
+                    quality = float(parameter[2:])
+                except ValueError:
+                    quality = 0.0
+        qualities[parts[0].lower()] = quality
+    return qualities
+
+
+def negotiate(header, available):
+    '''Best content encoding of the available ones for an Accept-Encoding header'''
+    qualities = parse_accept_encoding(header)
+    best, best_quality = 'identity', 0.0
+    for encoding in ENCODINGS:
+        if encoding not in available:
+            continue
+        default = 1.0 if encoding == 'identity' else qualities.get('*', 0.0)
+        quality = qualities.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def etag(entry, encoding):
+    '''Strong ETag of a variant (every encoding is a different representation)'''
+    return '"{0}-{1}"'.format(entry['hash'], encoding)
+
+
+def etag_matches(header, value):
+    '''True if an If-None-Match header matches the ETag'''
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or value in tags
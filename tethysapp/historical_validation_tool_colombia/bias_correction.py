@@ -0,0 +1,151 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+import math
+import numpy as np
+import pandas as pd
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+MONTHS = np.arange(1, 13)
+CORRECTED_COLUMN = 'Corrected Simulated Streamflow'
+
+
+
+####################################################################################################
+##                                    MONTHLY CDF TABLES                                          ##
+####################################################################################################
+
+def _flow_cdf(values):
+    '''
+    Empirical CDF of the flows of a month, with the same histogram bins used by geoglows.bias
+    (Sturges classes starting at -step). Only the part of the curve that changes is kept.
+    '''
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.array([np.nan]), np.array([np.nan])
+
+    # Get maximum value to bound histogram
+    max_val = math.ceil(np.max(values))
+    min_val = math.floor(np.min(values))
+    if max_val == min_val:
+        max_val += .1
+
+    # Histogram bins
+    number_of_classes = math.ceil(1 + (3.322 * math.log10(values.size)))
+    step_width = (max_val - min_val) / number_of_classes
+    bins = np.arange(-step_width, max_val + 2 * step_width, step_width)
+
+    # CDF at the upper edge of every bin
+    counts, bin_edges = np.histogram(values, bins=bins)
+    bin_edges = bin_edges[1:]
+    cdf = np.cumsum(counts.astype(float) / values.size)
+
+    # Drop the leading zeros (but the last one) and the trailing values after the CDF reaches its end
+    first = max(int(np.argmax(cdf > 0)) - 1, 0)
+    last = int(np.argmax(cdf >= cdf[-1]))
+    return bin_edges[first:last + 1], cdf[first:last + 1]
+
+
+def _pad(curves):
+    '''Stack the monthly curves in a fixed size matrix, repeating the last value of each curve'''
+    size = max(len(c) for c in curves)
+    table = np.empty((len(curves), size))
+    lengths = np.empty(len(curves), dtype=int)
+    for num, curve in enumerate(curves):
+        table[num, :len(curve)] = curve
+        table[num, len(curve):] = curve[-1]
+        lengths[num] = len(curve)
+    return table, lengths
+
+
+def build_monthly_tables(simulated_data, observed_data):
+    '''
+    Precompute the monthly flow duration curves of the simulated and observed series.
+
+    Returns a dict of (12 x n) arrays: 'sim_flow' and 'sim_cdf' map simulated flows to
+    probability and 'obs_cdf' and 'obs_flow' map probability to observed flows. Months
+    without data are filled with NaN.
+    '''
+    simulated = simulated_data.iloc[:, 0]
+    observed = observed_data.iloc[:, 0]
+    sim_flow, sim_cdf, obs_flow, obs_cdf = [], [], [], []
+    for month in MONTHS:
+        flow, cdf = _flow_cdf(simulated[simulated.index.month == month].to_numpy(dtype=float))
+        sim_flow.append(flow)
+        sim_cdf.append(cdf)
+        flow, cdf = _flow_cdf(observed[observed.index.month == month].to_numpy(dtype=float))
+        obs_flow.append(flow)
+        obs_cdf.append(cdf)
+    tables = {}
+    tables['sim_flow'], tables['sim_size'] = _pad(sim_flow)
+    tables['sim_cdf'], _ = _pad(sim_cdf)
+    tables['obs_flow'], tables['obs_size'] = _pad(obs_flow)
+    tables['obs_cdf'], _ = _pad(obs_cdf)
+    return tables
+
+
+
+####################################################################################################
+##                                       QUANTILE MAPPING                                         ##
+####################################################################################################
+
+def _interp(x, xp, fp, size):
+    '''
+    Linear interpolation with the same arithmetic of scipy.interpolate.interp1d (the left
+    point of repeated xp values is used), clamping x to the range of the curve.
+    '''
+    if size < 2:
+        return np.full(x.shape, fp[0])
+    xp = xp[:size]
+    fp = fp[:size]
+    x = np.clip(x, xp[0], xp[-1])
+    hi = np.clip(np.searchsorted(xp, x, side='left'), 1, size - 1)
+    lo = hi - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (fp[hi] - fp[lo]) / (xp[hi] - xp[lo])
+    return slope * (x - xp[lo]) + fp[lo]
+
+
+def correct_values(values, months, tables):
+    '''Bias correct an array of flows (any shape) whose rows belong to the given months'''
+    values = np.asarray(values, dtype=float)
+    months = np.asarray(months)
+    corrected = np.full(values.shape, np.nan)
+    for month in np.unique(months):
+        num = month - 1
+        rows = months == month
+        month_values = values[rows]
+        valid = ~np.isnan(month_values)
+        # Simulated flow -> probability -> observed flow
+        prob = _interp(month_values[valid], tables['sim_flow'][num], tables['sim_cdf'][num], tables['sim_size'][num])
+        prob = np.clip(prob, 0, 1)
+        month_corrected = np.full(month_values.shape, np.nan)
+        month_corrected[valid] = _interp(prob, tables['obs_cdf'][num], tables['obs_flow'][num], tables['obs_size'][num])
+        corrected[rows] = month_corrected
+    return corrected
+
+
+def correct_historical(simulated_data, tables):
+    '''Bias correction of the historical simulation (same output as geoglows.bias.correct_historical)'''
+    simulated = simulated_data.iloc[:, 0].dropna().sort_index()
+    corrected = correct_values(simulated.to_numpy(), simulated.index.month, tables)
+    return pd.DataFrame(data={CORRECTED_COLUMN: corrected}, index=simulated.index)
+
+
+def correct_forecast(forecast_data, tables, use_month=0):
+    '''Bias correction of forecast data with the curves of one month (like geoglows.bias.correct_forecast)'''
+    month = forecast_data.index[use_month].month
+    months = np.full(len(forecast_data.index), month)
+    corrected = correct_values(forecast_data.to_numpy(), months, tables)
+    return pd.DataFrame(corrected, index=forecast_data.index, columns=forecast_data.columns)
+
+
+def correct_forecast_by_month(forecast_data, tables):
+    '''Bias correction of forecast data, every row with the curves of its own month'''
+    corrected = correct_values(forecast_data.to_numpy(), forecast_data.index.month, tables)
+    return pd.DataFrame(corrected, index=forecast_data.index, columns=forecast_data.columns)
@@ -0,0 +1,344 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+# Base
+import os
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Cache settings (environment variables, same as the database credentials)
+APP_WORKSPACE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workspaces', 'app_workspace')
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(APP_WORKSPACE, 'cache'))
+CACHE_MEMORY_ITEMS = int(os.getenv('CACHE_MEMORY_ITEMS', 32))
+CACHE_DISK_MB = float(os.getenv('CACHE_DISK_MB', 1024))
+FRAME_STORE_TTL = int(os.getenv('FRAME_STORE_TTL', 3600))
+
+# Locks of get_or_compute: keys share a fixed number of locks, so the locks do not grow with
+# the number of keys
+KEY_LOCKS = 64
+
+# Files that store the versions shared by all the worker processes: the data version changes
+# when the tables are refreshed, the alerts version when the station alerts are written and
+# the zones version when the zones of the stations are computed
+DATA_VERSION_FILE = 'data_version'
+ALERTS_VERSION_FILE = 'alerts_version'
+ZONES_VERSION_FILE = 'zones_version'
+
+
+
+####################################################################################################
+##                                         DATA VERSION                                           ##
+####################################################################################################
+
+def _read_version(cache_dir, version_file):
+    try:
+        with open(os.path.join(cache_dir, version_file)) as f:
+            return f.read().strip() or '0'
+    except FileNotFoundError:
+        return '0'
+
+
+def _bump_version(cache_dir, version_file):
+    os.makedirs(cache_dir, exist_ok=True)
+    version = str(time.time_ns())
+    tmp_path = os.path.join(cache_dir, '.{0}.{1}'.format(version_file, os.getpid()))
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(cache_dir, version_file))
+    return version
+
+
+def get_data_version(cache_dir=CACHE_DIR):
+    '''Return the current data version (changes every time the tables are refreshed)'''
+    return _read_version(cache_dir, DATA_VERSION_FILE)
+
+
+def bump_data_version(cache_dir=CACHE_DIR):
+    '''Start a new data version. Entries of previous versions are never served again'''
+    return _bump_version(cache_dir, DATA_VERSION_FILE)
+
+
+def get_alerts_version(cache_dir=CACHE_DIR):
+    '''Return the current alerts version (changes every time the station alerts are written)'''
+    return _read_version(cache_dir, ALERTS_VERSION_FILE)
+
+
+def bump_alerts_version(cache_dir=CACHE_DIR):
+    return _bump_version(cache_dir, ALERTS_VERSION_FILE)
+
+
+def get_zones_version(cache_dir=CACHE_DIR):
+    '''Return the current zones version (changes every time the stations_zones table is written)'''
+    return _read_version(cache_dir, ZONES_VERSION_FILE)
+
+
+def bump_zones_version(cache_dir=CACHE_DIR):
+    return _bump_version(cache_dir, ZONES_VERSION_FILE)
+
+
+
+####################################################################################################
+##                                         DISK EVICTION                                          ##
+####################################################################################################
+
+def evict_files(directory, max_bytes, suffix, keep=None):
+    '''
+    Remove the files of directory (and its subfolders) ending with suffix that keep(name) rejects,
+    then the least recently used ones (by mtime) until the rest fit in max_bytes
+    '''
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if not name.endswith(suffix):
+                continue
+            path = os.path.join(root, name)
+            try:
+                if keep is not None and not keep(name):
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(f[1] for f in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+
+####################################################################################################
+##                                    STATION ANALYSIS CACHE                                      ##
+####################################################################################################
+
+class StationCache:
+    '''
+    Two tier cache (in-process LRU and local disk) for the station analyses.
+
+    Keys are tuples like (station_code, station_comid). The current data version is appended
+    to every key, so bumping the version invalidates the entries of all the workers at once.
+    Values must be picklable and must be treated as read-only by the callers.
+    '''
+
+    def __init__(self, namespace, cache_dir=CACHE_DIR, max_items=CACHE_MEMORY_ITEMS, max_disk_mb=CACHE_DISK_MB):
+        self.namespace = namespace
+        self.cache_dir = cache_dir
+        self.directory = os.path.join(cache_dir, namespace)
+        self.max_items = max_items
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self._memory = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks = [threading.Lock() for _ in range(KEY_LOCKS)]
+
+
+    def _full_key(self, key):
+        return tuple(str(k) for k in key) + (get_data_version(self.cache_dir), )
+
+
+    def _file_path(self, full_key):
+        name = hashlib.sha1(repr(full_key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, '{0}_{1}.pkl'.format(full_key[-1], name))
+
+
+    # Memory tier
+    def _memory_get(self, full_key):
+        with self._lock:
+            if full_key not in self._memory:
+                return None
+            self._memory.move_to_end(full_key)
+            return self._memory[full_key]
+
+
+    def _memory_set(self, full_key, value):
+        with self._lock:
+            self._memory[full_key] = value
+            self._memory.move_to_end(full_key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+
+    # Disk tier
+    def _disk_get(self, full_key):
+        path = self._file_path(full_key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        # Update access time for the LRU eviction of the disk tier
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+
+    def _disk_set(self, full_key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._file_path(full_key)
+        tmp_path = '{0}.{1}.{2}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._disk_evict()
+
+
+    def _disk_evict(self):
+        # Entries of old data versions are useless, then the disk tier must fit its size
+        version = get_data_version(self.cache_dir)
+        evict_files(self.directory, self.max_disk_bytes, '.pkl', keep=lambda name: name.startswith(version + '_'))
+
+
+    # Public API
+    def get(self, key, default=None):
+        full_key = self._full_key(key)
+        value = self._memory_get(full_key)
+        if value is None:
+            value = self._disk_get(full_key)
+            if value is None:
+                return default
+            self._memory_set(full_key, value)
+        return value
+
+
+    def set(self, key, value):
+        full_key = self._full_key(key)
+        self._memory_set(full_key, value)
+        self._disk_set(full_key, value)
+
+
+    def get_or_compute(self, key, func):
+        '''Return the cached value of key or compute it (only once per process) with func()'''
+        value = self.get(key)
+        if value is not None:
+            return value
+        # Avoid several threads computing the same station at the same time
+        key_lock = self._key_locks[hash(tuple(str(k) for k in key)) % KEY_LOCKS]
+        with key_lock:
+            value = self.get(key)
+            if value is None:
+                value = func()
+                self.set(key, value)
+        return value
+
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+
+####################################################################################################
+##                                      SESSION FRAME STORE                                       ##
+####################################################################################################
+
+class FrameStore:
+    '''
+    File-backed store of the dataframes computed for a user session, shared by all the worker
+    processes. Keys are tuples like (session_key, station_code, station_comid). Entries expire
+    ttl seconds after their last use and, like StationCache, with every new data version.
+    '''
+
+    def __init__(self, namespace, cache_dir=CACHE_DIR, ttl=FRAME_STORE_TTL):
+        self.namespace = namespace
+        self.cache_dir = cache_dir
+        self.directory = os.path.join(cache_dir, namespace)
+        self.ttl = ttl
+
+
+    def _file_path(self, key):
+        full_key = tuple(str(k) for k in key) + (get_data_version(self.cache_dir), )
+        name = hashlib.sha1(repr(full_key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, '{0}_{1}.pkl'.format(full_key[-1], name))
+
+
+    def get(self, key, default=None):
+        path = self._file_path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl < time.time():
+                os.remove(path)
+                return default
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return default
+        # Extend the life of the entry
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+
+    def set(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._file_path(key)
+        tmp_path = '{0}.{1}.{2}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.purge()
+
+
+    def delete(self, key):
+        try:
+            os.remove(self._file_path(key))
+        except FileNotFoundError:
+            pass
+
+
+    def purge(self):
+        '''Remove the expired entries and the ones of old data versions'''
+        version = get_data_version(self.cache_dir)
+        limit = time.time() - self.ttl
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.pkl'):
+                continue
+            try:
+                if not entry.name.startswith(version + '_') or entry.stat().st_mtime < limit:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def invalidate(cache_dir=CACHE_DIR):
+    '''Invalidate the cached analyses of every worker. Call it after the tables are refreshed'''
+    version = bump_data_version(cache_dir)
+    # Remove the files of the previous versions
+    if os.path.isdir(cache_dir):
+        for namespace in os.scandir(cache_dir):
+            if not namespace.is_dir():
+                continue
+            for entry in os.scandir(namespace.path):
+                if entry.name.startswith(version + '_'):
+                    continue
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+    return version
+
+
+if __name__ == '__main__':
+    # python -m tethysapp.historical_validation_tool_colombia.cache
+    print('New data version: {0}'.format(invalidate()))
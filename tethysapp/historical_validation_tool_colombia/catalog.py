@@ -0,0 +1,139 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+# orjson is optional, the standard json module is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from . import database
+from .cache import CACHE_DIR, get_data_version, get_alerts_version
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Columns of stations_streamflow renamed for the map (the other columns keep their names)
+CATALOG_COLUMNS = {"zona_hidrografica" : "basin",
+                   "codigo" : "code",
+                   "altitud" : "elevation",
+                   "stream_nam" : "river",
+                   "area_operativa" : "loc1",
+                   "area_hidrografica" : "loc2",
+                   "departamento" : "loc3"}
+
+# Properties of every station (text, except the coordinates)
+CATALOG_PROPERTIES = ["basin", "code", "name", "latitude", "longitude", "elevation", "comid", "river",
+                      "loc1", "loc2", "loc3", "alert", "concat"]
+
+# Seconds between the checks of the stations_streamflow table (environment variable), for the
+# stations and alerts written by other processes
+CATALOG_CHECK_SECONDS = float(os.getenv('CATALOG_CHECK_SECONDS', 60))
+
+logger = logging.getLogger(__name__)
+
+
+
+####################################################################################################
+##                                        STATION CATALOG                                         ##
+####################################################################################################
+
+def load_stations():
+    return database.read_sql('stations_streamflow', "select * , concat(codigo, ' - ', left(name, 23)) from stations_streamflow")
+
+
+def load_fingerprint():
+    return database.get_stations_fingerprint()
+
+
+def build_catalog(stations):
+    '''GeoJSON of the stations (same content pandas_geojson.to_geojson gave for the table)'''
+    stations = stations.rename(columns=CATALOG_COLUMNS)
+    values = {prop: stations[prop].astype(str).tolist() for prop in CATALOG_PROPERTIES}
+    values['latitude'] = stations['latitude'].astype(str).astype(float).tolist()
+    values['longitude'] = stations['longitude'].astype(str).astype(float).tolist()
+
+    features = []
+    for row in zip(*(values[prop] for prop in CATALOG_PROPERTIES)):
+        properties = dict(zip(CATALOG_PROPERTIES, row))
+        features.append({
+            'type': 'Feature',
+            'properties': properties,
+            'geometry': {'type': 'Point', 'coordinates': [properties['longitude'], properties['latitude']]},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def serialize(data):
+    '''Compact JSON bytes'''
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class StationCatalog:
+    '''
+    Serialized station catalog held in memory by every worker process. It is rebuilt when the
+    data version or the alerts version changes, or when the fingerprint of the table (checked
+    every check_seconds, None to disable the check) changes, and its ETag is the hash of the
+    content.
+    '''
+
+    def __init__(self, load=load_stations, cache_dir=CACHE_DIR, fingerprint=load_fingerprint,
+                 check_seconds=CATALOG_CHECK_SECONDS):
+        self.load = load
+        self.cache_dir = cache_dir
+        self.fingerprint = fingerprint
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._version = None
+        self._fingerprint = None
+        self._checked = None
+        self._catalog = (None, None, None)
+
+    def _is_stale(self, version):
+        return (version != self._version or self._checked is None or
+                time.monotonic() - self._checked >= self.check_seconds)
+
+    def _get_fingerprint(self):
+        if self.fingerprint is None:
+            return None
+        try:
+            return self.fingerprint()
+        except Exception:
+            if self._catalog[0] is None:
+                raise
+            # The current catalog is served until the table can be read again
+            logger.warning('Could not check the station catalog', exc_info=True)
+            return self._fingerprint
+
+    def get_catalog(self):
+        '''Return the catalog (JSON bytes), its strong ETag and its GeoJSON (read-only)'''
+        version = (get_data_version(self.cache_dir), get_alerts_version(self.cache_dir))
+        if self._is_stale(version):
+            with self._lock:
+                if self._is_stale(version):
+                    fingerprint = self._get_fingerprint()
+                    self._checked = time.monotonic()
+                    if version != self._version or fingerprint != self._fingerprint:
+                        data = build_catalog(self.load())
+                        body = serialize(data)
+                        self._catalog = (body, '"{0}"'.format(hashlib.sha256(body).hexdigest()[:32]), data)
+                        self._version = version
+                        self._fingerprint = fingerprint
+        return self._catalog
+
+    def get(self):
+        '''Return the catalog (JSON bytes) and its strong ETag'''
+        body, etag, _ = self.get_catalog()
+        return body, etag
@@ -0,0 +1,99 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+import os
+import numpy as np
+import pandas as pd
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Points per pixel of plot width kept by every trace (environment variable)
+LTTB_POINTS_PER_PIXEL = float(os.getenv('LTTB_POINTS_PER_PIXEL', 2))
+
+# Minimum number of points of a downsampled trace
+LTTB_MIN_POINTS = 200
+
+
+
+####################################################################################################
+##                                LARGEST TRIANGLE THREE BUCKETS                                  ##
+####################################################################################################
+
+def points_for_width(plot_width, points_per_pixel=LTTB_POINTS_PER_PIXEL):
+    '''Point budget of a trace drawn in plot_width pixels'''
+    return max(LTTB_MIN_POINTS, int(plot_width * points_per_pixel))
+
+
+def lttb(x, y, n_out):
+    '''
+    Largest-Triangle-Three-Buckets: positions of the n_out points of (x, y) that keep the
+    visual shape of the line. x must be increasing and y must not contain NaN.
+    '''
+    size = len(x)
+    if n_out >= size or n_out < 3:
+        return np.arange(size)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # The first and last points are always kept, the rest is split in n_out - 2 buckets
+    edges = np.linspace(1, size - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = size - 1
+
+    previous = 0
+    for num in range(n_out - 2):
+        start, end = edges[num], edges[num + 1]
+        # Average point of the next bucket (the last point for the last bucket)
+        if num < n_out - 3:
+            next_end = edges[num + 2]
+            avg_x = x[end:next_end].mean()
+            avg_y = y[end:next_end].mean()
+        else:
+            avg_x = x[-1]
+            avg_y = y[-1]
+        # Point of the bucket with the largest triangle with the previous and the average points
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous]) -
+                      (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[num + 1] = previous
+    return selected
+
+
+def downsample(series, n_out):
+    '''
+    Downsample a time series to about n_out points with LTTB. The gaps (NaN) of the series are
+    kept as NaN points, so plotly still breaks the line there.
+    '''
+    series = series.sort_index()
+    valid = series.notna().to_numpy()
+    values = series[valid]
+    if len(values) <= n_out:
+        return series
+
+    positions = np.flatnonzero(valid)[lttb(values.index.asi8, values.to_numpy(), n_out)]
+    result = series.iloc[positions]
+
+    # Put back one NaN point inside every gap between two selected points
+    missing = np.cumsum(~valid)
+    gaps = np.flatnonzero(missing[positions[1:]] > missing[positions[:-1]])
+    if len(gaps) > 0:
+        first_missing = np.flatnonzero(~valid)
+        gap_positions = first_missing[missing[positions[gaps]]]
+        result = pd.concat([result, series.iloc[gap_positions]]).sort_index()
+    return result
+
+
+def window(series, start=None, end=None):
+    '''Values of a time series between start and end (both included)'''
+    series = series.sort_index()
+    if start is not None:
+        series = series[series.index >= pd.to_datetime(start)]
+    if end is not None:
+        series = series[series.index <= pd.to_datetime(end)]
+    return series
@@ -0,0 +1,176 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+# Base
+import time
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+
+# App
+from . import fanout
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Computation timing counters of the nodes
+_stats = {}
+_stats_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+
+####################################################################################################
+##                                         ANALYSIS GRAPH                                         ##
+####################################################################################################
+
+def get_node_stats():
+    '''Number of computations, total and max time (seconds) of every node'''
+    with _stats_lock:
+        return {name: dict(values) for name, values in _stats.items()}
+
+
+def reset_node_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _record_time(name, elapsed):
+    with _stats_lock:
+        values = _stats.setdefault(name, {'count': 0, 'total_time': 0.0, 'max_time': 0.0})
+        values['count'] += 1
+        values['total_time'] += elapsed
+        values['max_time'] = max(values['max_time'], elapsed)
+
+
+class Node:
+    '''
+    Named computation: func(params, *values of deps). If cache is given the value is stored
+    under key(params), and the dependencies are not computed when it is found. Sources (data
+    read from the database or the APIs) raise fanout.SourceError, or return fallback() when a
+    fallback is given.
+    '''
+
+    def __init__(self, name, func, deps=(), cache=None, key=None, source=False,
+                 fallback=fanout.REQUIRED, timeout=fanout.SOURCE_TIMEOUT):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.cache = cache
+        self.key = key
+        self.source = source
+        self.fallback = fallback
+        self.timeout = timeout
+
+    def cache_key(self, params):
+        return self.key(params) + (self.name, )
+
+
+class AnalysisGraph:
+    '''
+    Nodes of the station analyses. evaluate computes only the nodes needed by the requested
+    outputs (the cached ones stop the walk), and runs the independent nodes at the same time.
+    '''
+
+    def __init__(self, key=None):
+        self.key = key
+        self.nodes = {}
+
+    def add(self, name, func, deps=(), cache=None, key=None, **options):
+        '''Add a node (see Node). The key of the graph is used when the node has no key'''
+        for dep in deps:
+            if dep not in self.nodes:
+                raise ValueError('Unknown dependency of {0}: {1}'.format(name, dep))
+        self.nodes[name] = Node(name, func, deps, cache=cache, key=key or self.key, **options)
+        return self.nodes[name]
+
+    def _plan(self, outputs, params):
+        '''Cached values found and nodes to compute (with their missing dependencies)'''
+        values = {}
+        pending = {}
+        stack = list(outputs)
+        while stack:
+            name = stack.pop()
+            if name in values or name in pending:
+                continue
+            if name not in self.nodes:
+                raise ValueError('Unknown analysis node: {0}'.format(name))
+            node = self.nodes[name]
+            if node.cache is not None:
+                value = node.cache.get(node.cache_key(params))
+                if value is not None:
+                    values[name] = value
+                    continue
+            pending[name] = node
+            stack.extend(node.deps)
+        return values, pending
+
+    def _compute(self, node, params, values):
+        start = time.perf_counter()
+        try:
+            return node.func(params, *[values[dep] for dep in node.deps])
+        finally:
+            _record_time(node.name, time.perf_counter() - start)
+
+    def _run(self, node, params, values):
+        if node.cache is None:
+            return self._compute(node, params, values)
+        key = node.cache_key(params)
+        if hasattr(node.cache, 'get_or_compute'):
+            # Computed only once when several requests need the same node
+            return node.cache.get_or_compute(key, lambda: self._compute(node, params, values))
+        value = self._compute(node, params, values)
+        node.cache.set(key, value)
+        return value
+
+    def _finish(self, node, params, values, future=None, error=None):
+        '''Store the value of a node computed by _run (its fallback or an error if it failed)'''
+        if error is None:
+            try:
+                value = future.result() if future is not None else self._run(node, params, values)
+            except Exception as e:
+                error = e
+        if error is not None:
+            if node.fallback is not fanout.REQUIRED:
+                logger.warning('Analysis node %s failed, using its fallback: %r', node.name, error)
+                value = node.fallback() if callable(node.fallback) else node.fallback
+            elif node.source:
+                raise fanout.SourceError(node.name, error) from error
+            else:
+                raise error
+        values[node.name] = value
+
+    def evaluate(self, outputs, **params):
+        '''Return {output: value}. The nodes are computed in the fan-out thread pool'''
+        values, pending = self._plan(outputs, params)
+        running = {}
+        started = {}
+        while pending or running:
+            ready = [node for node in pending.values() if all(dep in values for dep in node.deps)]
+            for node in ready:
+                del pending[node.name]
+            if len(ready) == 1 and not running and not ready[0].source:
+                # Nothing to run at the same time (sources run in the pool, under their timeout)
+                self._finish(ready[0], params, values)
+                continue
+            executor = fanout.get_executor()
+            for node in ready:
+                running[executor.submit(self._run, node, params, dict(values))] = node
+                started[node.name] = time.monotonic()
+
+            timeout = min(started[node.name] + node.timeout for node in running.values()) - time.monotonic()
+            done, _ = wait(running, timeout=max(0, timeout), return_when=FIRST_COMPLETED)
+            for future in done:
+                self._finish(running.pop(future), params, values, future)
+            now = time.monotonic()
+            for future, node in list(running.items()):
+                if now - started[node.name] >= node.timeout:
+                    # The thread can not be stopped, but its result is discarded
+                    del running[future]
+                    future.cancel()
+                    self._finish(node, params, values, error=TimeoutError('{0} s'.format(node.timeout)))
+        return {name: values[name] for name in outputs}
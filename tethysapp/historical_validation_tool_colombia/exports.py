@@ -0,0 +1,186 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+import os
+import re
+import shutil
+import zipfile
+import tempfile
+import numpy as np
+import pandas as pd
+from scipy.io import netcdf_file
+
+# pyarrow is optional, the parquet format is not available without it
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Export settings (environment variables): rows of every CSV chunk or parquet row group, and
+# megabytes of a file held in memory before it is written to disk
+EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', 10000))
+EXPORT_SPOOL_MB = float(os.getenv('EXPORT_SPOOL_MB', 16))
+
+# Content type and extension of every format (several sheets of csv and parquet go in a zip)
+EXPORT_FORMATS = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'),
+    'csv': ('text/csv', '.csv'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+    'netcdf': ('application/x-netcdf', '.nc'),
+}
+ZIP_FORMAT = ('application/zip', '.zip')
+
+
+
+####################################################################################################
+##                                          WRITERS                                               ##
+####################################################################################################
+
+def spooled_file():
+    return tempfile.SpooledTemporaryFile(max_size=int(EXPORT_SPOOL_MB * 1024 * 1024))
+
+
+def csv_chunks(data, chunk_rows=EXPORT_CHUNK_ROWS):
+    '''CSV of a dataframe (with its index) as encoded chunks of chunk_rows rows'''
+    yield data.iloc[:0].to_csv().encode('utf-8')
+    for start in range(0, len(data.index), chunk_rows):
+        yield data.iloc[start:start + chunk_rows].to_csv(header=False).encode('utf-8')
+
+
+class ZipStream:
+    '''Unseekable target of zipfile: the written bytes are taken by the generator'''
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        chunks, self.chunks = self.chunks, []
+        return b''.join(chunks)
+
+
+def zip_chunks(members):
+    '''Zip of the members ([(name, iterable of bytes)]) as chunks, without holding the members'''
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, chunks in members:
+            with archive.open(name, 'w', force_zip64=True) as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    yield stream.take()
+    yield stream.take()
+
+
+def write_xlsx(sheets, f):
+    with pd.ExcelWriter(f, engine='xlsxwriter') as writer:
+        for name, data in sheets:
+            data.to_excel(writer, sheet_name=name, index=True)
+
+
+def write_parquet(data, f, chunk_rows=EXPORT_CHUNK_ROWS):
+    table = pyarrow.Table.from_pandas(data, preserve_index=True)
+    pyarrow.parquet.write_table(table, f, row_group_size=chunk_rows)
+
+
+class KeepOpen:
+    '''File given to netcdf_file, which closes its target: the file stays open for the response'''
+
+    def __init__(self, f):
+        self.f = f
+        self.closed = False
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+    def close(self):
+        self.closed = True
+
+
+def netcdf_name(name):
+    '''NetCDF name of a column or sheet (letters, digits and underscores)'''
+    name = re.sub(r'[^0-9A-Za-z_]+', '_', str(name)).strip('_') or 'value'
+    return name if name[0].isalpha() else 'v_' + name
+
+
+def write_netcdf(sheets, f):
+    '''
+    NetCDF (classic format) with one dimension per sheet. The variables of every sheet are named
+    <sheet>_<column> when there are several sheets, the original names are in long_name
+    '''
+    dataset = netcdf_file(KeepOpen(f), 'w', version=2)
+    for sheet, data in sheets:
+        prefix = netcdf_name(sheet) + '_' if len(sheets) > 1 else ''
+        dimension = prefix + netcdf_name(data.index.name or 'index')
+        dataset.createDimension(dimension, len(data.index))
+        index = dataset.createVariable(dimension, 'f8', (dimension, ))
+        if isinstance(data.index, pd.DatetimeIndex):
+            index[:] = (data.index.tz_localize(None) - pd.Timestamp('1970-01-01')) / pd.Timedelta(seconds=1)
+            index.units = 'seconds since 1970-01-01 00:00:00'
+            index.calendar = 'standard'
+        else:
+            index[:] = data.index.to_numpy(dtype='f8')
+        for column in data.columns:
+            variable = dataset.createVariable(prefix + netcdf_name(column), 'f4', (dimension, ))
+            variable[:] = data[column].to_numpy(dtype=np.float32)
+            variable.long_name = str(column)
+            variable.missing_value = np.float32(np.nan)
+    dataset.close()
+
+
+
+####################################################################################################
+##                                          EXPORTS                                               ##
+####################################################################################################
+
+def available_formats():
+    return [name for name in EXPORT_FORMATS if name != 'parquet' or pyarrow is not None]
+
+
+def export(sheets, export_format='xlsx'):
+    '''
+    Export the sheets ([(name, dataframe)]) in a format. Returns the content type, the file
+    extension and the content: an iterable of chunks (csv) or a file at position 0. Raises
+    ValueError for unknown or not available formats.
+    '''
+    if export_format not in available_formats():
+        raise ValueError('Format not available: {0} ({1})'.format(export_format, ', '.join(available_formats())))
+    content_type, extension = EXPORT_FORMATS[export_format]
+
+    if export_format == 'csv':
+        if len(sheets) == 1:
+            return content_type, extension, csv_chunks(sheets[0][1])
+        members = [(name + extension, csv_chunks(data)) for name, data in sheets]
+        return ZIP_FORMAT + (zip_chunks(members), )
+
+    f = spooled_file()
+    if export_format == 'xlsx':
+        write_xlsx(sheets, f)
+    elif export_format == 'netcdf':
+        write_netcdf(sheets, f)
+    elif len(sheets) == 1:
+        write_parquet(sheets[0][1], f)
+    else:
+        # One parquet file per sheet in a zip (every sheet is spooled on its own)
+        with zipfile.ZipFile(f, 'w') as archive:
+            for name, data in sheets:
+                with spooled_file() as sheet_file:
+                    write_parquet(data, sheet_file)
+                    sheet_file.seek(0)
+                    with archive.open(name + extension, 'w', force_zip64=True) as member:
+                        shutil.copyfileobj(sheet_file, member)
+        content_type, extension = ZIP_FORMAT
+    f.seek(0)
+    return content_type, extension, f
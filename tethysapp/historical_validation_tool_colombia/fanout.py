@@ -0,0 +1,109 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+# Base
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Fan-out settings (environment variables)
+FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', 16))
+SOURCE_TIMEOUT = float(os.getenv('SOURCE_TIMEOUT', 120))
+
+# Marker of the sources without fallback
+REQUIRED = object()
+
+# Shared thread pool (one per process)
+_executor = None
+_executor_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+
+####################################################################################################
+##                                     CONCURRENT FETCHING                                        ##
+####################################################################################################
+
+class SourceError(Exception):
+    '''A required data source failed or did not answer in time'''
+
+    def __init__(self, name, error):
+        super().__init__('{0}: {1!r}'.format(name, error))
+        self.name = name
+        self.error = error
+
+
+def get_executor():
+    '''Return the thread pool of the process (created on first use)'''
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='fanout')
+    return _executor
+
+
+def dispose_executor():
+    '''Drop the thread pool. Forked worker processes must call it before fetching'''
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def source(func, *args, timeout=SOURCE_TIMEOUT, fallback=REQUIRED, **kwargs):
+    '''
+    Describe a data source for fetch_all. If fallback is given, a failure or timeout of the
+    source returns fallback() (or fallback itself when it is not callable) instead of raising.
+    '''
+    return {'func': func, 'args': args, 'kwargs': kwargs, 'timeout': timeout, 'fallback': fallback}
+
+
+class PendingSources:
+    '''Sources submitted by submit_all. The caller can do other work before asking the results'''
+
+    def __init__(self, sources):
+        self.sources = sources
+        self.start = time.monotonic()
+        executor = get_executor()
+        self.futures = {name: executor.submit(s['func'], *s['args'], **s['kwargs']) for name, s in sources.items()}
+
+
+    def results(self):
+        '''
+        Wait for the sources and return {name: result}. Every timeout counts from the submission,
+        so the wall time is the one of the slowest source. Raises SourceError when a required
+        source fails.
+        '''
+        results = {}
+        for name, future in self.futures.items():
+            spec = self.sources[name]
+            remaining = max(0, self.start + spec['timeout'] - time.monotonic())
+            try:
+                results[name] = future.result(timeout=remaining)
+            except Exception as e:
+                # The thread can not be stopped, but its result is discarded
+                future.cancel()
+                if spec['fallback'] is REQUIRED:
+                    raise SourceError(name, e) from e
+                logger.warning('Source %s failed, using its fallback: %r', name, e)
+                results[name] = spec['fallback']() if callable(spec['fallback']) else spec['fallback']
+        return results
+
+
+def submit_all(sources):
+    '''Start the independent sources ({name: source(...)}) in the thread pool'''
+    return PendingSources(sources)
+
+
+def fetch_all(sources):
+    '''Run the independent sources ({name: source(...)}) at the same time and return {name: result}'''
+    return submit_all(sources).results()
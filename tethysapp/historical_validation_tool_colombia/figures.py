@@ -0,0 +1,123 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+import json
+import base64
+import numbers
+import datetime as dt
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from plotly.utils import PlotlyJSONEncoder
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Data arrays of the traces sent as typed arrays
+FIGURE_ARRAYS = ('x', 'y')
+
+# Layout templates sent once to the client (the figures only carry the name)
+SHARED_TEMPLATES = ('plotly',)
+
+
+
+####################################################################################################
+##                                         TYPED ARRAYS                                           ##
+####################################################################################################
+
+def _is_dates(array):
+    '''True if an object array holds dates (first non null value)'''
+    for value in array:
+        if value is not None:
+            return isinstance(value, (dt.date, np.datetime64))
+    return False
+
+
+def _is_numbers(array):
+    '''True if an object array only holds numbers and None'''
+    return all(value is None or isinstance(value, numbers.Number) for value in array)
+
+
+def _typed_array(array, dtype):
+    return {'dtype': dtype, 'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def encode_array(values):
+    '''
+    Typed array of a data array: dates as int64 epoch milliseconds ('i8') and numbers as
+    float32 ('f4'), little endian and base64 encoded. Missing numbers are NaN. The dates keep
+    their wall time (plotly ignores the time zones). Other arrays are returned as they are.
+    '''
+    if values is None or isinstance(values, (dict, str)):
+        return values
+    array = np.asarray(values)
+    if array.ndim != 1:
+        return values
+
+    if array.dtype.kind == 'M' or (array.dtype == object and _is_dates(array)):
+        try:
+            dates = pd.DatetimeIndex(pd.to_datetime(array))
+        except (ValueError, TypeError):
+            return values
+        if dates.hasnans:
+            return values
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        return _typed_array(dates.values.astype('datetime64[ms]').astype('<i8'), 'i8')
+
+    if array.dtype.kind in 'biuf' or (array.dtype == object and _is_numbers(array)):
+        return _typed_array(np.array(array, dtype='<f4'), 'f4')
+    return values
+
+
+
+####################################################################################################
+##                                           FIGURES                                              ##
+####################################################################################################
+
+def template_name(template):
+    '''Name of a shared layout template (None if the template is not shared)'''
+    for name in SHARED_TEMPLATES:
+        if template == pio.templates[name]:
+            return name
+    return None
+
+
+def get_templates(names):
+    '''Layout templates of the given names (only the shared ones)'''
+    return {name: pio.templates[name].to_plotly_json() for name in names if name in SHARED_TEMPLATES}
+
+
+def to_payload(figure):
+    '''
+    Compact JSON of a plotly figure, assembled by the client (public/js/figures.js). The data
+    arrays are typed arrays and a shared layout template is replaced by its name.
+    '''
+    layout = figure.layout.to_plotly_json()
+    template = template_name(figure.layout.template)
+    if template is not None:
+        layout.pop('template', None)
+
+    data = []
+    for trace in figure.data:
+        trace_json = trace.to_plotly_json()
+        for key in FIGURE_ARRAYS:
+            if trace_json.get(key) is None:
+                continue
+            trace_json[key] = encode_array(trace[key])
+            # Epoch milliseconds are only drawn as dates on date axes
+            if isinstance(trace_json[key], dict) and trace_json[key]['dtype'] == 'i8':
+                axis = (trace_json.get(key + 'axis') or key).replace(key, key + 'axis', 1)
+                layout.setdefault(axis, {}).setdefault('type', 'date')
+        data.append(trace_json)
+
+    return {'template': template, 'layout': layout, 'data': data}
+
+
+def dumps(payload):
+    '''JSON text of figure payloads, safe to embed in a script element of a template'''
+    text = json.dumps(payload, cls=PlotlyJSONEncoder)
+    return text.replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
@@ -0,0 +1,212 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+# Data
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+# Base
+import io
+import os
+import re
+import time
+import random
+import datetime as dt
+import threading
+from .cache import CACHE_DIR, evict_files
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# GEOGLOWS API settings (environment variables). GEOGLOWS_API_URL can point to a local server
+GEOGLOWS_API_URL = os.getenv('GEOGLOWS_API_URL', 'https://geoglows.ecmwf.int/api')
+GEOGLOWS_CONNECT_TIMEOUT = float(os.getenv('GEOGLOWS_CONNECT_TIMEOUT', 10))
+GEOGLOWS_READ_TIMEOUT = float(os.getenv('GEOGLOWS_READ_TIMEOUT', 60))
+GEOGLOWS_RETRIES = int(os.getenv('GEOGLOWS_RETRIES', 4))
+GEOGLOWS_BACKOFF = float(os.getenv('GEOGLOWS_BACKOFF', 1))
+GEOGLOWS_BACKOFF_MAX = float(os.getenv('GEOGLOWS_BACKOFF_MAX', 30))
+GEOGLOWS_POOL_SIZE = int(os.getenv('GEOGLOWS_POOL_SIZE', 10))
+GEOGLOWS_CACHE_DIR = os.getenv('GEOGLOWS_CACHE_DIR', os.path.join(CACHE_DIR, 'geoglows'))
+GEOGLOWS_CACHE_MB = float(os.getenv('GEOGLOWS_CACHE_MB', 512))
+
+# Days of forecast records before the forecast date
+RECORDS_DAYS = 10
+
+# Responses that are worth retrying
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# Valid identifiers
+_REACH_ID_RE = re.compile(r'^[0-9]+$')
+_DATE_RE = re.compile(r'^[0-9]{8}$')
+
+# Shared client (one per process)
+_client = None
+_client_lock = threading.Lock()
+
+
+
+####################################################################################################
+##                                           CLIENT                                               ##
+####################################################################################################
+
+class GeoglowsAPIError(Exception):
+    '''The GEOGLOWS API could not return the data after all the retries'''
+
+
+def _check_reach_id(reach_id):
+    reach_id = str(reach_id)
+    if not _REACH_ID_RE.match(reach_id):
+        raise ValueError('Invalid reach_id: {0}'.format(reach_id))
+    return reach_id
+
+
+def _check_date(date):
+    date = str(date)
+    if not _DATE_RE.match(date):
+        raise ValueError('Invalid date (YYYYMMDD): {0}'.format(date))
+    return date
+
+
+class GeoglowsClient:
+    '''
+    GEOGLOWS REST API client with a pooled session, timeouts and bounded exponential backoff.
+
+    The CSV responses of past dates never change, so they are stored in cache_dir keyed by
+    (reach_id, date) and read from disk the next time. The least recently used files are removed
+    when the cache exceeds cache_mb. Set cache_dir to None to disable it.
+    '''
+
+    def __init__(self, base_url=GEOGLOWS_API_URL, cache_dir=GEOGLOWS_CACHE_DIR, cache_mb=GEOGLOWS_CACHE_MB,
+                 timeout=(GEOGLOWS_CONNECT_TIMEOUT, GEOGLOWS_READ_TIMEOUT), retries=GEOGLOWS_RETRIES,
+                 backoff=GEOGLOWS_BACKOFF, backoff_max=GEOGLOWS_BACKOFF_MAX, pool_size=GEOGLOWS_POOL_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.cache_dir = cache_dir
+        self.cache_bytes = int(cache_mb * 1024 * 1024)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+
+    def close(self):
+        self.session.close()
+
+
+    # Disk cache
+    def _cache_path(self, kind, reach_id, date):
+        return os.path.join(self.cache_dir, kind, '{0}_{1}.csv'.format(reach_id, date))
+
+
+    def _is_cacheable(self, date):
+        # Only the forecasts of past days are final
+        return self.cache_dir is not None and date < dt.datetime.now(dt.timezone.utc).strftime('%Y%m%d')
+
+
+    def _cache_get(self, kind, reach_id, date):
+        if not self._is_cacheable(date):
+            return None
+        path = self._cache_path(kind, reach_id, date)
+        try:
+            with open(path) as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        # Update access time for the LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return content
+
+
+    def _cache_set(self, kind, reach_id, date, content):
+        if not self._is_cacheable(date):
+            return
+        path = self._cache_path(kind, reach_id, date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = '{0}.{1}.{2}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        evict_files(self.cache_dir, self.cache_bytes, '.csv')
+
+
+    # HTTP
+    def _wait(self, attempt):
+        delay = min(self.backoff_max, self.backoff * 2 ** attempt)
+        time.sleep(delay * random.uniform(0.5, 1))
+
+
+    def get_csv(self, endpoint, params):
+        '''GET a CSV of the API, retrying connection errors, timeouts and 429/5xx responses'''
+        url = '{0}/{1}/'.format(self.base_url, endpoint)
+        params = dict(params, return_format='csv')
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                self._wait(attempt - 1)
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+                continue
+            if response.status_code in RETRY_STATUS:
+                error = 'HTTP {0}'.format(response.status_code)
+                continue
+            if response.status_code != 200:
+                raise GeoglowsAPIError('{0} returned HTTP {1}'.format(endpoint, response.status_code))
+            return response.text
+        raise GeoglowsAPIError('{0} failed after {1} attempts: {2}'.format(endpoint, self.retries + 1, error))
+
+
+    def _get_cached_csv(self, kind, reach_id, date, endpoint, params):
+        content = self._cache_get(kind, reach_id, date)
+        if content is None:
+            content = self.get_csv(endpoint, params)
+            data = _read_csv(content, endpoint)
+            self._cache_set(kind, reach_id, date, content)
+            return data
+        return _read_csv(content, endpoint)
+
+
+    # Public API
+    def forecast_ensembles(self, reach_id, date):
+        '''Ensemble forecast (52 members) issued on date (YYYYMMDD)'''
+        reach_id = _check_reach_id(reach_id)
+        date = _check_date(date)
+        return self._get_cached_csv('ensembles', reach_id, date, 'ForecastEnsembles',
+                                    {'reach_id': reach_id, 'date': date})
+
+
+    def forecast_records(self, reach_id, date, days=RECORDS_DAYS):
+        '''Forecast records of the days before date (YYYYMMDD)'''
+        reach_id = _check_reach_id(reach_id)
+        date = _check_date(date)
+        start_date = (dt.datetime.strptime(date, '%Y%m%d') - dt.timedelta(days=days)).strftime('%Y%m%d')
+        return self._get_cached_csv('records_{0}'.format(days), reach_id, date, 'ForecastRecords',
+                                    {'reach_id': reach_id, 'start_date': start_date, 'end_date': date})
+
+
+def _read_csv(content, endpoint):
+    try:
+        return pd.read_csv(io.StringIO(content), index_col=0)
+    except (ValueError, pd.errors.ParserError) as e:
+        raise GeoglowsAPIError('{0} returned an invalid CSV: {1}'.format(endpoint, e))
+
+
+def get_client():
+    '''Return the client of the process (created on first use)'''
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GeoglowsClient()
+    return _client
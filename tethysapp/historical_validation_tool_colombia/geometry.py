@@ -0,0 +1,140 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+import os
+import json
+import numpy as np
+import shapely
+from shapely.geometry import shape, mapping
+
+from .cache import APP_WORKSPACE
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Full resolution layers (public/geojson) and simplified levels (environment variable)
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public', 'geojson')
+GEOMETRY_DIR = os.getenv('GEOMETRY_DIR', os.path.join(APP_WORKSPACE, 'geometry'))
+
+# Layers of the selection boxes
+GEOMETRY_LAYERS = ('dep', 'hydr_zone', 'sub_hydr_zone')
+
+# Simplified levels: (maximum map zoom, tolerance in degrees, decimals of the coordinates).
+# The tolerance is about one pixel at the maximum zoom of the level
+GEOMETRY_LEVELS = [
+    (7, 0.002, 3),
+    (9, 0.0005, 4),
+    (11, 0.0001, 4),
+    (None, 0.00002, 5),
+]
+
+
+
+####################################################################################################
+##                                        SIMPLIFICATION                                          ##
+####################################################################################################
+
+def simplify_geometries(geometries, tolerance):
+    '''
+    Simplify the polygons of a layer. The shared borders of a valid coverage are simplified
+    once (no gaps or overlaps between neighbours), other layers are simplified one by one
+    without self intersections.
+    '''
+    geometries = np.asarray(geometries, dtype=object)
+    if hasattr(shapely, 'coverage_simplify') and shapely.coverage_is_valid(geometries):
+        return shapely.coverage_simplify(geometries, tolerance)
+    return shapely.simplify(geometries, tolerance, preserve_topology=True)
+
+
+def quantize_geometries(geometries, decimals):
+    '''Snap the coordinates to a grid of the given decimals (keeps the polygons valid)'''
+    quantized = shapely.set_precision(geometries, 10 ** -decimals)
+    # Tiny polygons can collapse in the grid, they keep the simplified geometry
+    return np.where(shapely.is_empty(quantized), geometries, quantized)
+
+
+def _round_coordinates(coordinates, decimals):
+    if isinstance(coordinates[0], (int, float)):
+        return [round(value, decimals) for value in coordinates]
+    return [_round_coordinates(item, decimals) for item in coordinates]
+
+
+def simplify_collection(collection, tolerance, decimals):
+    '''Simplified and quantized copy of a GeoJSON feature collection'''
+    features = [f for f in collection['features'] if f.get('geometry')]
+    geometries = quantize_geometries(
+        simplify_geometries([shape(f['geometry']) for f in features], tolerance), decimals)
+    simplified = []
+    for feature, geometry in zip(features, geometries):
+        geometry = mapping(geometry)
+        simplified.append({
+            'type': 'Feature',
+            'properties': feature.get('properties'),
+            'geometry': {'type': geometry['type'],
+                         'coordinates': _round_coordinates(geometry['coordinates'], decimals)},
+        })
+    return {'type': 'FeatureCollection', 'features': simplified}
+
+
+
+####################################################################################################
+##                                     LEVELS OF THE LAYERS                                       ##
+####################################################################################################
+
+def get_level(zoom):
+    '''Simplified level drawn at a map zoom'''
+    for level, (max_zoom, _, _) in enumerate(GEOMETRY_LEVELS):
+        if max_zoom is None or zoom <= max_zoom:
+            return level
+    return len(GEOMETRY_LEVELS) - 1
+
+
+def source_path(layer, name):
+    '''Full resolution file of a layer. Raises ValueError for unknown layers or file names'''
+    if layer not in GEOMETRY_LAYERS or name != os.path.basename(name) or not name.endswith('.json'):
+        raise ValueError('Unknown geometry: {0}/{1}'.format(layer, name))
+    path = os.path.join(SOURCE_DIR, layer, name)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(path)
+    return path
+
+
+def level_path(layer, name, level, geometry_dir=GEOMETRY_DIR):
+    return os.path.join(geometry_dir, layer, str(level), name)
+
+
+def get_geometry_file(layer, name, zoom, geometry_dir=GEOMETRY_DIR):
+    '''File to draw a layer at a map zoom (full resolution if the levels were not built)'''
+    path = source_path(layer, name)
+    simplified = level_path(layer, name, get_level(zoom), geometry_dir)
+    return simplified if os.path.isfile(simplified) else path
+
+
+def build_file(layer, name, geometry_dir=GEOMETRY_DIR, force=False):
+    '''
+    Write the simplified levels of a layer file. Every level stores its maximum zoom
+    ("max_zoom", null for the last one) so the client knows when to load the next one.
+    Returns the size in bytes of every level (None for the levels that were up to date).
+    '''
+    path = source_path(layer, name)
+    with open(path, encoding='utf-8') as f:
+        collection = json.load(f)
+
+    sizes = []
+    for level, (max_zoom, tolerance, decimals) in enumerate(GEOMETRY_LEVELS):
+        output = level_path(layer, name, level, geometry_dir)
+        if not force and os.path.isfile(output) and os.path.getmtime(output) >= os.path.getmtime(path):
+            sizes.append(None)
+            continue
+        simplified = simplify_collection(collection, tolerance, decimals)
+        simplified['max_zoom'] = max_zoom
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        tmp_path = '{0}.{1}.tmp'.format(output, os.getpid())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(simplified, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, output)
+        sizes.append(os.path.getsize(output))
+    return sizes
@@ -0,0 +1,58 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from tethysapp.historical_validation_tool_colombia import geometry
+
+
+def build_geometry_file(layer, name, geometry_dir, force):
+    '''Simplified levels of a layer file. Returns (layer, name, sizes, seconds, error)'''
+    start = time.perf_counter()
+    try:
+        sizes = geometry.build_file(layer, name, geometry_dir, force)
+        return layer, name, sizes, time.perf_counter() - start, None
+    except Exception as e:
+        return layer, name, None, time.perf_counter() - start, repr(e)
+
+
+class Command(BaseCommand):
+    help = ('Write the simplified levels (several tolerances, quantized coordinates) of the '
+            'department and hydrographic zone layers served by get-geometry.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layers', nargs='+', default=list(geometry.GEOMETRY_LAYERS),
+                            choices=geometry.GEOMETRY_LAYERS, help='Only build these layers.')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of worker processes (default: number of CPUs).')
+        parser.add_argument('--output', default=geometry.GEOMETRY_DIR,
+                            help='Output directory (default: GEOMETRY_DIR).')
+        parser.add_argument('--force', action='store_true',
+                            help='Rebuild the files that are up to date.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        files = [(layer, name)
+                 for layer in options['layers']
+                 for name in sorted(os.listdir(os.path.join(geometry.SOURCE_DIR, layer)))
+                 if name.endswith('.json')]
+
+        built = 0
+        failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            futures = [executor.submit(build_geometry_file, layer, name, options['output'], options['force'])
+                       for layer, name in files]
+            for future in as_completed(futures):
+                layer, name, sizes, elapsed, error = future.result()
+                label = '{0}/{1}'.format(layer, name)
+                if error is None:
+                    built += 1
+                    sizes = ' '.join('-' if size is None else '{0:.0f}k'.format(size / 1024) for size in sizes)
+                    self.stdout.write('{0:<70} {1:<32} {2:6.2f} s'.format(label, sizes, elapsed))
+                else:
+                    failed += 1
+                    self.stderr.write('{0:<70} {1:<32} {2:6.2f} s  {3}'.format(label, 'ERROR', elapsed, error))
+
+        self.stdout.write(self.style.SUCCESS(
+            '{0} files built ({1} failed) in {2:.1f} s'.format(built, failed, time.perf_counter() - start)))
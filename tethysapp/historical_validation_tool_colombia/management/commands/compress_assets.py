@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from tethysapp.historical_validation_tool_colombia import assets
+
+
+def build_asset(name, path, assets_dir):
+    '''Precompressed variants of a file. Returns (name, entry, seconds, error)'''
+    start = time.perf_counter()
+    try:
+        entry = assets.build_asset(name, path, assets_dir)
+        return name, entry, time.perf_counter() - start, None
+    except Exception as e:
+        return name, None, time.perf_counter() - start, repr(e)
+
+
+class Command(BaseCommand):
+    help = ('Write the gzip and brotli variants of the geojson layers and of the simplified '
+            'geometry levels with content-hash names, and the manifest used by get-geometry.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of worker processes (default: number of CPUs).')
+        parser.add_argument('--output', default=assets.ASSETS_DIR,
+                            help='Output directory (default: ASSETS_DIR).')
+        parser.add_argument('--no-prune', action='store_true',
+                            help='Keep the variants that are not in the new manifest.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if assets.brotli is None:
+            self.stderr.write('brotli is not installed, only the gzip variants are written')
+
+        entries = {}
+        failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            futures = [executor.submit(build_asset, name, path, options['output'])
+                       for name, path in assets.list_sources()]
+            for future in as_completed(futures):
+                name, entry, elapsed, error = future.result()
+                if error is None:
+                    entries[name] = entry
+                    sizes = ' '.join('{0} {1:.0f}k'.format(encoding, size / 1024)
+                                     for encoding, size in entry['encodings'].items())
+                    self.stdout.write('{0:<80} {1:<36} {2:6.2f} s'.format(name, sizes, elapsed))
+                else:
+                    failed += 1
+                    self.stderr.write('{0:<80} {1:<36} {2:6.2f} s  {3}'.format(name, 'ERROR', elapsed, error))
+
+        # The files that failed keep being served from the source
+        removed = assets.write_manifest(entries, options['output'], prune=not options['no_prune'])
+        self.stdout.write(self.style.SUCCESS(
+            '{0} files compressed ({1} failed, {2} old variants removed) in {3:.1f} s'.format(
+                len(entries), failed, removed, time.perf_counter() - start)))
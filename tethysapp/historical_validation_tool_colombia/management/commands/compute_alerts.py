@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from tethysapp.historical_validation_tool_colombia import database, fanout
+from tethysapp.historical_validation_tool_colombia.controllers import station_graph, get_station_alert
+
+
+def _init_worker():
+    # Every worker opens its own connections and threads
+    database.dispose_engine(close=False)
+    fanout.dispose_executor()
+
+
+def compute_station_alert(station_code, station_comid):
+    '''Alert class of a station for the last forecast. Returns (code, alert, seconds, error)'''
+    start = time.perf_counter()
+    try:
+        data = station_graph.evaluate(['corrected_ensemble_stats', 'corrected_return_periods', 'corrected_qmin_vals'],
+                                      station_code = station_code, station_comid = station_comid)
+        alert = get_station_alert(
+            stats = data['corrected_ensemble_stats'],
+            rperiods = data['corrected_return_periods'],
+            low_warnings = data['corrected_qmin_vals'])
+        return station_code, alert, time.perf_counter() - start, None
+    except Exception as e:
+        return station_code, None, time.perf_counter() - start, repr(e)
+
+
+class Command(BaseCommand):
+    help = ('Compute the alert class of every station in stations_streamflow with the corrected '
+            'forecast and thresholds, and write them back in one transaction.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of worker processes (default: number of CPUs).')
+        parser.add_argument('--stations', nargs='+', default=None,
+                            help='Only compute these station codes.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Compute and report the alerts without writing them.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stations = database.get_stations()
+        stations = stations.dropna()
+        if options['stations']:
+            stations = stations[stations['codigo'].astype(str).isin(options['stations'])]
+        stations = [(str(row.codigo), str(int(row.comid))) for row in stations.itertuples()]
+
+        # Parallel computation of the alerts
+        alerts = {}
+        failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as executor:
+            futures = [executor.submit(compute_station_alert, code, comid) for code, comid in stations]
+            for future in as_completed(futures):
+                code, alert, elapsed, error = future.result()
+                if error is None:
+                    alerts[code] = alert
+                    self.stdout.write('{0:<12} {1:<8} {2:8.2f} s'.format(code, alert, elapsed))
+                else:
+                    failed += 1
+                    self.stderr.write('{0:<12} {1:<8} {2:8.2f} s  {3}'.format(code, 'ERROR', elapsed, error))
+
+        # Bulk update
+        if not options['dry_run']:
+            database.update_station_alerts(alerts)
+
+        self.stdout.write(self.style.SUCCESS(
+            '{0} alerts computed ({1} failed) in {2:.1f} s'.format(len(alerts), failed, time.perf_counter() - start)))
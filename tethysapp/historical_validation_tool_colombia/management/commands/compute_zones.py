@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tethysapp.historical_validation_tool_colombia import database, zones
+
+
+class Command(BaseCommand):
+    help = ('Intersect every station of stations_streamflow with the department, hydrographic zone '
+            'and sub zone polygons, and write the zone of every station in the stations_zones table.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Compute and report the zones without writing them.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stations = database.get_station_points().dropna()
+        membership = zones.compute_membership(stations, zones.ZoneIndex())
+
+        for layer in zones.ZONE_LAYERS:
+            outside = membership[layer].isna()
+            self.stdout.write('{0:<16} {1:>5} zones {2:>6} stations outside all the zones'.format(
+                layer, membership[layer].nunique(), int(outside.sum())))
+            for code in membership.loc[outside, 'codigo']:
+                self.stderr.write('{0:<16} {1} is outside all the zones'.format(layer, code))
+
+        if not options['dry_run']:
+            database.write_station_zones(membership)
+
+        self.stdout.write(self.style.SUCCESS(
+            'Zones of {0} stations computed in {1:.1f} s'.format(len(membership.index), time.perf_counter() - start)))
@@ -0,0 +1,60 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from tethysapp.historical_validation_tool_colombia import database, simulation
+from tethysapp.historical_validation_tool_colombia.cache import bump_data_version
+
+
+def _init_worker():
+    # Every worker opens its own connections
+    database.dispose_engine(close=False)
+
+
+def read_simulation(comid):
+    '''Historical simulation of a comid from its table. Returns (comid, data, seconds, error)'''
+    start = time.perf_counter()
+    try:
+        return comid, database.read_historical_simulation(comid), time.perf_counter() - start, None
+    except Exception as e:
+        return comid, None, time.perf_counter() - start, repr(e)
+
+
+class Command(BaseCommand):
+    help = ('Export the historical simulation (hs_{comid} tables) of every station to one float32 '
+            '(comid x date) matrix memory-mapped by the app. The tables stay the source of the data, '
+            'run it again after every ingest of the historical simulation.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of worker processes (default: number of CPUs).')
+        parser.add_argument('--output', default=simulation.SIMULATION_DIR,
+                            help='Output directory (default: SIMULATION_DIR).')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stations = database.get_stations().dropna()
+        comids = sorted({str(int(comid)) for comid in stations['comid']})
+
+        series = {}
+        failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as executor:
+            futures = [executor.submit(read_simulation, comid) for comid in comids]
+            for future in as_completed(futures):
+                comid, data, elapsed, error = future.result()
+                if error is None:
+                    series[comid] = data
+                else:
+                    failed += 1
+                    self.stderr.write('{0:<12} {1:6.2f} s  {2}'.format(comid, elapsed, error))
+
+        written, skipped = simulation.write_matrix(series, options['output'])
+        for comid in skipped:
+            self.stderr.write('{0:<12} left out of the matrix (dates off the common axis)'.format(comid))
+        # The cached analyses may come from older tables
+        bump_data_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            '{0} comids exported ({1} left out, {2} failed) in {3:.1f} s'.format(
+                len(written), len(skipped), failed, time.perf_counter() - start)))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tethysapp.historical_validation_tool_colombia import database
+from tethysapp.historical_validation_tool_colombia.cache import bump_data_version
+
+
+class Command(BaseCommand):
+    help = ('Copy the observed streamflow of the wide observed_streamflow_data table (one s_{code} '
+            'column per station) to the long observed_streamflow table (station_code, datetime, value) '
+            'clustered by station. Set OBSERVED_STORAGE=long to read the long table.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stations', nargs='+', default=None,
+                            help='Station codes to copy again (all the s_{code} columns by default).')
+        parser.add_argument('--no-cluster', action='store_true',
+                            help='Do not reorder the table by station after the copy.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List the stations that would be copied without writing them.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stations = options['stations']
+        if options['dry_run']:
+            stations = stations or database.get_wide_observed_stations()
+            self.stdout.write('{0} stations: {1}'.format(len(stations), ' '.join(stations)))
+            return
+
+        def progress(station_code, rows):
+            self.stdout.write('{0:<12} {1:>8} rows'.format(station_code, rows))
+
+        rows = database.migrate_observed(stations, cluster=not options['no_cluster'], progress=progress)
+        # The cached analyses may come from the old table
+        bump_data_version()
+
+        self.stdout.write(self.style.SUCCESS('{0} rows of {1} stations copied in {2:.1f} s'.format(
+            sum(rows.values()), len(rows), time.perf_counter() - start)))
@@ -0,0 +1,60 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from tethysapp.historical_validation_tool_colombia import database, fanout, renderer
+from tethysapp.historical_validation_tool_colombia.controllers import IMAGE_GRAPHS, get_station_image
+
+
+def _init_worker():
+    # Every worker opens its own connections and threads, and renders with its own kaleido
+    database.dispose_engine(close=False)
+    fanout.dispose_executor()
+    renderer.dispose_pool()
+
+
+def render_station_image(station_code, station_comid, station_name, type_graph):
+    '''PNG of get_image in the image cache. Returns (code, graph, size, seconds, error)'''
+    start = time.perf_counter()
+    try:
+        image = get_station_image(station_code, station_comid, station_name, type_graph, render=renderer.to_png)
+        return station_code, type_graph, len(image), time.perf_counter() - start, None
+    except Exception as e:
+        return station_code, type_graph, None, time.perf_counter() - start, repr(e)
+
+
+class Command(BaseCommand):
+    help = ('Render the get_image graphs of every station of stations_waterlevel into the image '
+            'cache. Run it after every ingest (the images of the new forecast cycle are rendered, '
+            'the images already rendered are kept).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of worker processes (default: number of CPUs).')
+        parser.add_argument('--stations', nargs='+', default=None,
+                            help='Only render these station codes.')
+        parser.add_argument('--graphs', nargs='+', default=list(IMAGE_GRAPHS), choices=list(IMAGE_GRAPHS),
+                            help='Only render these graphs.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        stations = database.get_waterlevel_stations(options['stations']).dropna()
+        stations = [(str(row.codigo), str(int(row.comid)), row.nombre) for row in stations.itertuples()]
+
+        rendered = 0
+        failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as executor:
+            futures = [executor.submit(render_station_image, code, comid, name, graph)
+                       for code, comid, name in stations for graph in options['graphs']]
+            for future in as_completed(futures):
+                code, graph, size, elapsed, error = future.result()
+                if error is None:
+                    rendered += 1
+                    self.stdout.write('{0:<12} {1:<12} {2:6.0f}k {3:8.2f} s'.format(code, graph, size / 1024, elapsed))
+                else:
+                    failed += 1
+                    self.stderr.write('{0:<12} {1:<12} {2:>7} {3:8.2f} s  {4}'.format(code, graph, 'ERROR', elapsed, error))
+
+        self.stdout.write(self.style.SUCCESS(
+            '{0} images rendered ({1} failed) in {2:.1f} s'.format(rendered, failed, time.perf_counter() - start)))
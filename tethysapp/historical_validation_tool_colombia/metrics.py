@@ -0,0 +1,107 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+import math
+import numpy as np
+import pandas as pd
+from HydroErr.HydroErr import function_list, metric_abbr
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Metrics shown by default in the metrics tab
+DEFAULT_METRICS = ["ME", "RMSE", "NRMSE (Mean)", "NSE", "KGE (2009)", "KGE (2012)", "R (Pearson)", "R (Spearman)", "r2"]
+
+# Series evaluated against the observed data (key in the results, column in the table)
+SERIES = {'simulated': 'Simulated Serie',
+          'corrected': 'Corrected Serie'}
+
+# Abbreviations accepted by hydrostats.make_table that are not in HydroErr.metric_abbr
+METRIC_ALIASES = {'H6 (AHE)': 'H6 (MAHE)'}
+
+
+
+####################################################################################################
+##                                        METRICS ENGINE                                          ##
+####################################################################################################
+
+def get_metric_function(metric):
+    '''HydroErr function of a metric abbreviation (same names used by hydrostats.make_table)'''
+    abbr = METRIC_ALIASES.get(metric, metric)
+    try:
+        return function_list[metric_abbr.index(abbr)]
+    except ValueError:
+        raise ValueError('Unknown metric: {0}'.format(metric))
+
+
+def unique_metrics(metrics):
+    '''Metrics in order, without repetitions or empty names'''
+    return list(dict.fromkeys(m.strip() for m in metrics if m and m.strip()))
+
+
+def prepare_arrays(merged_data):
+    '''
+    Simulated and observed arrays of a merged dataframe (hydrostats.data.merge_data), without
+    the pairs that HydroErr would discard (NaN or inf in any of them)
+    '''
+    sim = merged_data.iloc[:, 0].to_numpy(dtype=float)
+    obs = merged_data.iloc[:, 1].to_numpy(dtype=float)
+    valid = np.isfinite(sim) & np.isfinite(obs)
+    return sim[valid], obs[valid]
+
+
+def evaluate(sim, obs, metrics):
+    '''Evaluate several metrics over the same prepared arrays. Returns {metric: value}'''
+    return {metric: float(get_metric_function(metric)(sim, obs)) for metric in metrics}
+
+
+def compute_metrics(merged, metrics, known=None):
+    '''
+    Metrics of every series in merged ({'simulated': merged_sim, 'corrected': merged_cor}).
+
+    known holds the values computed before ({series: {metric: value}}). Only the missing metrics
+    are evaluated. Returns the results and the updated known values (None if nothing was computed).
+    '''
+    metrics = unique_metrics(metrics)
+    # Check the names before computing anything
+    for metric in metrics:
+        get_metric_function(metric)
+
+    known = {series: dict(values) for series, values in (known or {}).items()}
+    updated = False
+    for series in SERIES:
+        values = known.setdefault(series, {})
+        missing = [m for m in metrics if m not in values]
+        if missing:
+            values.update(evaluate(*prepare_arrays(merged[series]), missing))
+            updated = True
+
+    result = {
+        'metrics': metrics,
+        'series': {series: {m: known[series][m] for m in metrics} for series in SERIES},
+    }
+    return result, (known if updated else None)
+
+
+def to_json(result):
+    '''JSON friendly copy of the results (NaN and inf as null)'''
+    def clean(value):
+        return value if math.isfinite(value) else None
+    return {
+        'metrics': result['metrics'],
+        'series': {series: {m: clean(v) for m, v in values.items()} for series, values in result['series'].items()},
+    }
+
+
+def to_html(result):
+    '''Metrics table of the panel (rounded to two decimals)'''
+    table = pd.DataFrame(
+        {SERIES[series]: [result['series'][series][m] for m in result['metrics']] for series in SERIES},
+        index=result['metrics'])
+    table = table.round(decimals=2)
+    table = table.to_html(classes="table table-hover table-striped", table_id="corrected_1")
+    table = table.replace('border="1"', 'border="0"').replace('<tr style="text-align: right;">','<tr style="text-align: left;">')
+    return table
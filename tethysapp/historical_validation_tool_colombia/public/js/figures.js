@@ -0,0 +1,61 @@
+// Figures sent as compact JSON (figures.py): the data arrays are base64 typed arrays and the
+// layout templates are shared by all the figures, they are loaded once and kept here
+figure_templates = {};
+
+typed_arrays = {
+    "i1": Int8Array, "u1": Uint8Array, "i2": Int16Array, "u2": Uint16Array,
+    "i4": Int32Array, "u4": Uint32Array, "f4": Float32Array, "f8": Float64Array,
+};
+
+// Typed array of an encoded data array (int64 epoch milliseconds are converted to numbers)
+function decode_figure_array(value){
+    if (!value || typeof value.bdata !== "string") return value;
+    var binary = atob(value.bdata);
+    var bytes = new Uint8Array(binary.length);
+    for (var i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+    if (value.dtype == "i8") return Float64Array.from(new BigInt64Array(bytes.buffer), Number);
+    return new typed_arrays[value.dtype](bytes.buffer);
+}
+
+function decode_figure_trace(trace){
+    var decoded = {};
+    for (var key in trace) decoded[key] = decode_figure_array(trace[key]);
+    return decoded;
+}
+
+// Shared layout template of a figure (requested to the server the first time, the figure is
+// drawn without it if the request fails)
+function get_figure_template(name){
+    if (!name) return $.Deferred().resolve(undefined).promise();
+    if (!(name in figure_templates)) {
+        figure_templates[name] = $.ajax({
+            type: 'GET',
+            url: "get-figure-templates",
+            data: {names: name}
+        }).then(function(response){
+            return response[name];
+        }, function(){
+            delete figure_templates[name];
+        });
+    }
+    return figure_templates[name];
+}
+
+// Draw a figure payload inside a container, returns a promise with the plot element
+function render_figure(container, payload){
+    if (!$(container).length) return $.Deferred().resolve(undefined).promise();
+    return get_figure_template(payload.template).then(function(template){
+        var layout = Object.assign({}, payload.layout);
+        if (template) layout.template = template;
+        var plot = $("<div>").appendTo($(container).empty())[0];
+        return Plotly.newPlot(plot, payload.data.map(decode_figure_trace), layout);
+    });
+}
+
+// Draw the figures of a script element with the JSON {container id: payload}
+function render_figures(script_id){
+    var figures = JSON.parse($(`#${script_id}`).text());
+    return $.when.apply($, Object.keys(figures).map(function(container_id){
+        return render_figure(`#${container_id}`, figures[container_id]);
+    }));
+}
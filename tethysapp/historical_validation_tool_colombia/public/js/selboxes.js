@@ -410,21 +410,18 @@ let subhyz = [
 // ------------------------------------------------------------------------------------------------------------ //
 
 // Generate options for Localities
-const loc_url = `${server}/static/historical_validation_tool_colombia/geojson/dep/`;
 loc = loc.map((item) => {
     var option_custom = `<option value="${item.file}">${item.name}</option>`;
     return(option_custom);
   }).join("");
 
 // Generate options for hydrological zones
-const hyz_url = `${server}/static/historical_validation_tool_colombia/geojson/hydr_zone/`;
 hyz = hyz.map((item) => {
     var option_custom = `<option value="${item.file}">${item.name}</option>`;
     return(option_custom);
   }).join("");
 
 // Generate options for subhydrological zones
-const subhyz_url = `${server}/static/historical_validation_tool_colombia/geojson/sub_hydr_zone/`;
 subhyz = subhyz.map((item) => {
     var option_custom = `<option value="${item.file}">${item.name}</option>`;
     return(option_custom);
@@ -458,6 +455,33 @@ selbox_control = `
     </div>
 `
 
+// Boundaries of the selected department or zone (get-geometry). The level simplified for the
+// current zoom is drawn first, a finer level is loaded when the map is zoomed in past it
+geometry_selection = undefined;
+
+function load_geometry(layer_name, file, fit){
+    if (!file) return;
+    var selection = geometry_selection = {layer: layer_name, file: file, max_zoom: null};
+    return fetch(`get-geometry?layer=${layer_name}&file=${encodeURIComponent(file)}&zoom=${map.getZoom()}`)
+        .then((response) => (layer = response.json()))
+        .then((layer) => {
+            // Only the last selection is drawn
+            if (selection !== geometry_selection) return;
+            selection.max_zoom = layer.max_zoom;
+            // Remove the current layer
+            if (typeof layerSHP !== 'undefined') {
+                map.removeLayer(layerSHP)
+            }
+            // Add retrieved layer and fit to map
+            if(file === "COLOMBIA.geojson"){
+                layerSHP = L.geoJSON(layer, { style:  {weight: 2, fillOpacity: 0} }).addTo(map);
+            }else{
+                layerSHP = L.geoJSON(layer, { style: { weight: 1 } }).addTo(map);
+            }
+            if (fit) map.fitBounds(layerSHP.getBounds());
+        });
+}
+
 function dynamic_select_boxes(){
 
     // Select box for ZOOM to localities (Provincias)
@@ -465,22 +489,7 @@ function dynamic_select_boxes(){
         create: false,
         //sortField: { field: 'text', direction: 'asc'},
         onChange: function(value, isOnInitialize) {
-            // Retrieve geojson from REST API
-            fetch(`${loc_url}${value}`)
-            .then((response) => (layer = response.json()))
-            .then((layer) => {
-                // Remove the current layer
-                if (typeof layerSHP !== 'undefined') {
-                    map.removeLayer(layerSHP)
-                }
-                // Add retrieved layer and fit to map
-                if(value === "COLOMBIA.geojson"){
-                    layerSHP = L.geoJSON(layer, { style:  {weight: 2, fillOpacity: 0} }).addTo(map);
-                }else{
-                    layerSHP = L.geoJSON(layer, { style: { weight: 1 } }).addTo(map);
-                }
-                map.fitBounds(layerSHP.getBounds());
-            });
+            load_geometry("dep", value, true);
         }
     });
 
@@ -489,22 +498,7 @@ function dynamic_select_boxes(){
         create: true,
         //sortField: { field: 'text', direction: 'asc'},
         onChange: function(value, isOnInitialize) {
-            // Retrieve geojson from REST API
-            fetch(`${hyz_url}${value}`)
-            .then((response) => (layer = response.json()))
-            .then((layer) => {
-                // Remove the current layer
-                if (typeof layerSHP !== 'undefined') {
-                    map.removeLayer(layerSHP)
-                }
-                // Add retrieved layer and fit to map
-                if(value === "COLOMBIA.geojson"){
-                    layerSHP = L.geoJSON(layer, { style:  {weight: 2, fillOpacity: 0} }).addTo(map);
-                }else{
-                    layerSHP = L.geoJSON(layer, { style: { weight: 1 } }).addTo(map);
-                }
-                map.fitBounds(layerSHP.getBounds());
-            });
+            load_geometry("hydr_zone", value, true);
         }
     });
 
@@ -514,22 +508,15 @@ function dynamic_select_boxes(){
         create: true,
         //sortField: { field: 'text', direction: 'asc'},
         onChange: function(value, isOnInitialize) {
-            // Retrieve geojson from REST API
-            fetch(`${subhyz_url}${value}`)
-            .then((response) => (layer = response.json()))
-            .then((layer) => {
-                // Remove the current layer
-                if (typeof layerSHP !== 'undefined') {
-                    map.removeLayer(layerSHP)
-                }
-                // Add retrieved layer and fit to map
-                if(value === "COLOMBIA.geojson"){
-                    layerSHP = L.geoJSON(layer, { style:  {weight: 2, fillOpacity: 0} }).addTo(map);
-                }else{
-                    layerSHP = L.geoJSON(layer, { style: { weight: 1 } }).addTo(map);
-                }
-                map.fitBounds(layerSHP.getBounds());
-            });
+            load_geometry("sub_hydr_zone", value, true);
+        }
+    });
+
+    // Finer level of the selected boundaries
+    map.on("zoomend", function(){
+        var selection = geometry_selection;
+        if (selection && selection.max_zoom !== null && selection.max_zoom !== undefined && map.getZoom() > selection.max_zoom) {
+            load_geometry(selection.layer, selection.file, false);
         }
     });
 
@@ -0,0 +1,137 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+# Base
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# Plotly (kaleido renders the images)
+import plotly.io as pio
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Renderer pool settings (environment variables): worker processes, images waiting for a worker
+# and seconds to render an image
+RENDER_WORKERS = int(os.getenv('RENDER_WORKERS', 2))
+RENDER_QUEUE = int(os.getenv('RENDER_QUEUE', 8))
+RENDER_TIMEOUT = float(os.getenv('RENDER_TIMEOUT', 60))
+
+# Shared renderer pool (one per process)
+_pool = None
+_pool_lock = threading.Lock()
+
+
+
+####################################################################################################
+##                                         RENDERER POOL                                          ##
+####################################################################################################
+
+class RendererBusy(Exception):
+    '''All the renderers are busy and the queue is full'''
+
+
+def to_png(figure):
+    '''PNG bytes of a figure (figure object or dict) rendered in this process'''
+    return pio.to_image(figure, format='png')
+
+
+def _warm_up():
+    # Start kaleido once per worker, the later images reuse it
+    to_png({'data': [], 'layout': {}})
+
+
+class RendererPool:
+    '''
+    Worker processes that keep kaleido running between images. At most workers + queue images
+    are accepted at a time, the others raise RendererBusy.
+    '''
+
+    def __init__(self, workers=RENDER_WORKERS, queue=RENDER_QUEUE, timeout=RENDER_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers do not inherit the threads and connections of the server
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _reset(self, executor):
+        '''
+        Drop the executor and terminate its workers: shutdown never stops a running worker, so a
+        hung renderer (and its browser) would stay alive
+        '''
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    def render(self, figure):
+        '''PNG bytes of a figure. Raises RendererBusy when the queue is full'''
+        if not self._slots.acquire(blocking=False):
+            raise RendererBusy()
+        try:
+            figure = figure.to_dict() if hasattr(figure, 'to_dict') else figure
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    return executor.submit(to_png, figure).result(timeout=self.timeout)
+                except BrokenProcessPool:
+                    # A renderer died (the browser crashed), start new workers once
+                    self._reset(executor)
+                    if attempt:
+                        raise
+                except TimeoutError:
+                    # A hung renderer would hold its worker forever, the workers are terminated
+                    self._reset(executor)
+                    raise
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_pool():
+    '''Return the renderer pool of the process (created on first use)'''
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RendererPool()
+    return _pool
+
+
+def dispose_pool():
+    '''Drop the renderer pool. Forked worker processes must call it before rendering'''
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def render(figure):
+    '''PNG bytes of a figure rendered by the pool of the process'''
+    return get_pool().render(figure)
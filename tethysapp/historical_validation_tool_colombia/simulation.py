@@ -0,0 +1,158 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+import os
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+from .cache import APP_WORKSPACE
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Historical simulation of all the stations as one (comid x date) float32 matrix (environment variable)
+SIMULATION_DIR = os.getenv('SIMULATION_DIR', os.path.join(APP_WORKSPACE, 'simulation'))
+INDEX_FILE = 'historical_simulation.json'
+MATRIX_PREFIX = 'historical_simulation-'
+
+
+
+####################################################################################################
+##                                        BUILD THE MATRIX                                        ##
+####################################################################################################
+
+def date_axis(series):
+    '''
+    Common date axis (start, step) of several series: the most common step, starting at the first
+    date. Returns None if there are no dates
+    '''
+    steps = pd.Series(np.concatenate([np.diff(data.index.values) for data in series.values()] or [[]]))
+    starts = [data.index[0] for data in series.values() if len(data.index) > 0]
+    if steps.empty or not starts:
+        return None
+    return min(starts), pd.Timedelta(steps.mode().iloc[0])
+
+
+def on_axis(index, start, step):
+    '''Position of the first and last dates of a series if it fills the axis between them (else None)'''
+    if len(index) == 0 or index.hasnans or step <= pd.Timedelta(0):
+        return None
+    offsets = (index - start) // step
+    if ((index - start) % step != pd.Timedelta(0)).any() or not (np.diff(offsets) == 1).all():
+        return None
+    return int(offsets[0]), int(offsets[-1])
+
+
+def write_matrix(series, simulation_dir=SIMULATION_DIR):
+    '''
+    Write the series ({comid: dataframe with one column, indexed by date}) as a float32 matrix on
+    a common date axis and its index. The series with other dates (gaps or dates out of the axis)
+    are left out and read from the database. Returns the comids written and the comids left out.
+    '''
+    os.makedirs(simulation_dir, exist_ok=True)
+    axis = date_axis(series)
+    rows = {}
+    if axis is not None:
+        start, step = axis
+        for comid, data in series.items():
+            bounds = on_axis(pd.DatetimeIndex(data.index), start, step) if data.shape[1] == 1 else None
+            if bounds is not None:
+                rows[comid] = bounds
+    skipped = sorted(set(series) - set(rows))
+    comids = sorted(rows)
+    dates = max([last + 1 for _, last in rows.values()] or [0])
+
+    # New matrix file, then the index that points to it (the workers keep their old mapping)
+    name = '{0}{1}.npy'.format(MATRIX_PREFIX, time.strftime('%Y%m%d%H%M%S'))
+    path = os.path.join(simulation_dir, name)
+    matrix = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=np.float32, shape=(len(comids), dates))
+    matrix[:] = np.nan
+    for num, comid in enumerate(comids):
+        first, last = rows[comid]
+        matrix[num, first:last + 1] = series[comid].iloc[:, 0].to_numpy(dtype=np.float32)
+    matrix.flush()
+    del matrix
+    os.replace(path + '.tmp', path)
+
+    index = {
+        'matrix': name,
+        'start': start.isoformat() if rows else None,
+        'step': step.value if rows else None,
+        'comids': [str(comid) for comid in comids],
+        'columns': [str(series[comid].columns[0]) for comid in comids],
+        'first': [rows[comid][0] for comid in comids],
+        'last': [rows[comid][1] for comid in comids],
+    }
+    index_path = os.path.join(simulation_dir, INDEX_FILE)
+    with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(index_path + '.tmp', index_path)
+
+    # Old matrices (still readable by the workers that mapped them until they reload)
+    for old in os.listdir(simulation_dir):
+        if old.startswith(MATRIX_PREFIX) and old.endswith('.npy') and old != name:
+            os.remove(os.path.join(simulation_dir, old))
+    return comids, skipped
+
+
+
+####################################################################################################
+##                                        READ THE MATRIX                                         ##
+####################################################################################################
+
+class SimulationMatrix:
+    '''
+    Memory-mapped historical simulation matrix, shared by the worker processes through the page
+    cache. It is mapped again when the index changes (manage.py export_simulation).
+    '''
+
+    def __init__(self, simulation_dir=SIMULATION_DIR):
+        self.simulation_dir = simulation_dir
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._matrix = None
+
+    def _load(self):
+        path = os.path.join(self.simulation_dir, INDEX_FILE)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    matrix = None
+                    if mtime is not None:
+                        with open(path, encoding='utf-8') as f:
+                            index = json.load(f)
+                        values = np.load(os.path.join(self.simulation_dir, index['matrix']), mmap_mode='r')
+                        dates = pd.DatetimeIndex([], name='datetime')
+                        if index['comids']:
+                            dates = pd.date_range(pd.Timestamp(index['start']), periods=values.shape[1],
+                                                  freq=pd.Timedelta(index['step']), name='datetime')
+                        rows = {comid: (num, column, first, last) for num, (comid, column, first, last) in
+                                enumerate(zip(index['comids'], index['columns'], index['first'], index['last']))}
+                        matrix = (values, dates, rows)
+                    self._matrix = matrix
+                    self._mtime = mtime
+        return self._matrix
+
+    def __contains__(self, comid):
+        matrix = self._load()
+        return matrix is not None and str(comid) in matrix[2]
+
+    def get(self, comid):
+        '''Historical simulation of a comid (same dataframe as the hs_{comid} table) or None'''
+        matrix = self._load()
+        if matrix is None or str(comid) not in matrix[2]:
+            return None
+        values, dates, rows = matrix
+        num, column, first, last = rows[str(comid)]
+        # The mapped pages are shared, the dataframe gets its own (writable) copy of the row
+        return pd.DataFrame({column: np.array(values[num, first:last + 1])}, index=dates[first:last + 1])
@@ -0,0 +1,70 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import assets
+
+
+class AssetsTestCase(TethysTestCase):
+
+    def set_up(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.assets_dir = tempfile.mkdtemp()
+        self.roots = {'geojson': self.source_dir}
+        os.makedirs(os.path.join(self.source_dir, 'dep'))
+        self.path = os.path.join(self.source_dir, 'dep', 'Choco.json')
+        with open(self.path, 'w') as f:
+            f.write('{"type":"FeatureCollection","features":[]}' * 50)
+
+    def tear_down(self):
+        shutil.rmtree(self.source_dir, ignore_errors=True)
+        shutil.rmtree(self.assets_dir, ignore_errors=True)
+
+    def build(self):
+        entries = {name: assets.build_asset(name, path, self.assets_dir)
+                   for name, path in assets.list_sources(self.roots)}
+        assets.write_manifest(entries, self.assets_dir)
+        return assets.AssetManifest(self.assets_dir, self.roots)
+
+    def test_content_hash_names(self):
+        manifest = self.build()
+        name = manifest.hashed_name(self.path)
+        entry = manifest.get(name)
+
+        self.assertTrue(name.startswith('geojson/dep/Choco.') and name.endswith('.json'))
+        self.assertIn(entry['hash'], name)
+        with open(manifest.variant_path(entry, 'gzip'), 'rb') as f:
+            with open(self.path, 'rb') as source:
+                self.assertEqual(gzip.decompress(f.read()), source.read())
+        self.assertLess(entry['encodings']['gzip'], entry['encodings']['identity'])
+        self.assertEqual('br' in entry['encodings'], assets.brotli is not None)
+
+    def test_changed_sources_are_not_served(self):
+        manifest = self.build()
+        old_name = manifest.hashed_name(self.path)
+        with open(self.path, 'a') as f:
+            f.write(' ')
+        self.assertIsNone(manifest.hashed_name(self.path))
+
+        manifest = self.build()
+        new_name = manifest.hashed_name(self.path)
+        self.assertNotEqual(new_name, old_name)
+        self.assertIsNone(manifest.get(old_name))
+        files = [f for _, _, filenames in os.walk(self.assets_dir) for f in filenames if f != assets.MANIFEST_FILE]
+        self.assertTrue(all(os.path.basename(new_name) in f for f in files))
+
+    def test_negotiation(self):
+        available = {'br': 1, 'gzip': 1, 'identity': 1}
+        self.assertEqual(assets.negotiate('gzip, deflate, br', available), 'br')
+        self.assertEqual(assets.negotiate('gzip, deflate, br', {'gzip': 1, 'identity': 1}), 'gzip')
+        self.assertEqual(assets.negotiate('br;q=0.5, gzip', available), 'gzip')
+        self.assertEqual(assets.negotiate('br;q=0, gzip;q=0', available), 'identity')
+        self.assertEqual(assets.negotiate(None, available), 'identity')
+        self.assertEqual(assets.negotiate('*', available), 'br')
+
+        entry = {'hash': 'abc'}
+        self.assertTrue(assets.etag_matches('"x", "abc-gzip"', assets.etag(entry, 'gzip')))
+        self.assertFalse(assets.etag_matches('"abc-br"', assets.etag(entry, 'gzip')))
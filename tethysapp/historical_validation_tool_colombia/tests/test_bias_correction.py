@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import geoglows
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import bias_correction
+from tethysapp.historical_validation_tool_colombia.controllers import get_corrected_forecast_records
+
+
+def legacy_get_corrected_forecast_records(records_df, simulated_df, observed_df):
+    '''
+    Previous month loop implementation of get_corrected_forecast_records, kept as reference.
+    DataFrame.append is replaced by pd.concat and the chained assignments by .loc
+    '''
+    date_ini = records_df.index[0]
+    month_ini = date_ini.month
+    date_end = records_df.index[-1]
+    month_end = date_end.month
+    meses = np.arange(month_ini, month_end + 1, 1)
+    fixed_records = pd.DataFrame()
+    for mes in meses:
+        values = records_df.loc[records_df.index.month == mes]
+        monthly_simulated = simulated_df[simulated_df.index.month == mes].dropna()
+        min_simulated = np.min(monthly_simulated.iloc[:, 0].to_list())
+        max_simulated = np.max(monthly_simulated.iloc[:, 0].to_list())
+        min_factor_records_df = values.copy()
+        max_factor_records_df = values.copy()
+        fixed_records_df = values.copy()
+        column_records = values.columns[0]
+        tmp = records_df[column_records].dropna().to_frame()
+        min_factor = tmp.copy()
+        max_factor = tmp.copy()
+        min_factor.loc[min_factor[column_records] >= min_simulated, column_records] = 1
+        min_index_value = min_factor[min_factor[column_records] != 1].index.tolist()
+        for element in min_index_value:
+            min_factor.loc[min_factor.index == element, column_records] = tmp[column_records].loc[tmp.index == element] / min_simulated
+        max_factor.loc[max_factor[column_records] <= max_simulated, column_records] = 1
+        max_index_value = max_factor[max_factor[column_records] != 1].index.tolist()
+        for element in max_index_value:
+            max_factor.loc[max_factor.index == element, column_records] = tmp[column_records].loc[tmp.index == element] / max_simulated
+        tmp.loc[tmp[column_records] <= min_simulated, column_records] = min_simulated
+        tmp.loc[tmp[column_records] >= max_simulated, column_records] = max_simulated
+        fixed_records_df.update(pd.DataFrame(tmp[column_records].values, index=tmp.index, columns=[column_records]))
+        min_factor_records_df.update(pd.DataFrame(min_factor[column_records].values, index=min_factor.index, columns=[column_records]))
+        max_factor_records_df.update(pd.DataFrame(max_factor[column_records].values, index=max_factor.index, columns=[column_records]))
+        corrected_values = geoglows.bias.correct_forecast(fixed_records_df, simulated_df, observed_df)
+        corrected_values = corrected_values.multiply(min_factor_records_df, axis=0)
+        corrected_values = corrected_values.multiply(max_factor_records_df, axis=0)
+
+        fixed_records = pd.concat([fixed_records, corrected_values])
+
+    fixed_records.sort_index(inplace=True)
+    return(fixed_records)
+
+
+def build_series(start, end, freq, scale, seed, column):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, end, freq=freq)
+    seasonal = 1 + 0.5 * np.sin(2 * np.pi * index.dayofyear.values / 365.25)
+    values = scale * seasonal * rng.lognormal(mean=0, sigma=0.4, size=index.size)
+    return pd.DataFrame({column: values}, index=index)
+
+
+class BiasCorrectionTestCase(TethysTestCase):
+
+    def set_up(self):
+        self.simulated = build_series('1990-01-01', '2021-12-31', 'D', 120, 1, 'streamflow_m^3/s')
+        self.observed = build_series('1995-01-01', '2021-12-31', 'D', 90, 2, 's_21237010')
+        # Forecast records crossing a month, with values out of the simulated range and gaps
+        self.records = build_series('2023-01-20', '2023-02-10', '3h', 120, 3, 'streamflow_m^3/s')
+        self.records.iloc[3, 0] = 1000.0
+        self.records.iloc[7, 0] = 0.5
+        self.records.iloc[11, 0] = np.nan
+
+    def test_corrected_forecast_records_matches_month_loop(self):
+        expected = legacy_get_corrected_forecast_records(self.records, self.simulated, self.observed)
+        result = get_corrected_forecast_records(self.records, self.simulated, self.observed)
+
+        self.assertTrue(result.index.equals(expected.index))
+        self.assertEqual(list(result.columns), list(expected.columns))
+        np.testing.assert_allclose(result.values, expected.values, rtol=1e-12, equal_nan=True)
+
+    def test_corrected_forecast_records_keeps_every_month(self):
+        records = build_series('2022-12-25', '2023-01-05', '3h', 120, 4, 'streamflow_m^3/s')
+        result = get_corrected_forecast_records(records, self.simulated, self.observed)
+
+        self.assertTrue(result.index.equals(records.index))
+        self.assertFalse(result.isna().any().any())
+
+    def test_historical_correction_matches_geoglows(self):
+        expected = geoglows.bias.correct_historical(self.simulated, self.observed)
+        tables = bias_correction.build_monthly_tables(self.simulated, self.observed)
+        result = bias_correction.correct_historical(self.simulated, tables)
+
+        self.assertTrue(result.index.equals(expected.index))
+        self.assertEqual(list(result.columns), list(expected.columns))
+        np.testing.assert_allclose(result.values, expected.values, rtol=1e-12)
+
+    def test_forecast_correction_matches_geoglows(self):
+        forecast = build_series('2023-03-29', '2023-04-08', '3h', 120, 5, 'ensemble_01_m^3/s')
+        monthly = self.simulated[self.simulated.index.month == 3].iloc[:, 0]
+        forecast = forecast.clip(monthly.min(), monthly.max())
+        expected = geoglows.bias.correct_forecast(forecast, self.simulated, self.observed)
+        tables = bias_correction.build_monthly_tables(self.simulated, self.observed)
+        result = bias_correction.correct_forecast(forecast, tables)
+
+        np.testing.assert_allclose(result.values, expected.values, rtol=1e-12)
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import threading
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import cache
+from tethysapp.historical_validation_tool_colombia.cache import StationCache
+
+
+class StationCacheTestCase(TethysTestCase):
+
+    def set_up(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tear_down(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def files(self, station_cache):
+        return [name for name in os.listdir(station_cache.directory) if name.endswith('.pkl')]
+
+    def test_memory_lru(self):
+        station_cache = StationCache('lru', cache_dir=self.cache_dir, max_items=2)
+        station_cache.set(('A', ), 'a')
+        station_cache.set(('B', ), 'b')
+        station_cache.get(('A', ))
+        station_cache.set(('C', ), 'c')
+        self.assertEqual([key[0] for key in station_cache._memory], ['A', 'C'])
+
+        # The least recently used entry is still read from the disk tier
+        self.assertEqual(station_cache.get(('B', )), 'b')
+        self.assertEqual([key[0] for key in station_cache._memory], ['C', 'B'])
+
+    def test_disk_size_eviction(self):
+        station_cache = StationCache('disk', cache_dir=self.cache_dir, max_items=1, max_disk_mb=0.25)
+        for n in range(4):
+            station_cache.set((n, ), b'x' * 100000)
+            path = station_cache._file_path(station_cache._full_key((n, )))
+            os.utime(path, (n, n))
+        # Only the two most recent files fit in 0.25 MB
+        self.assertEqual(len(self.files(station_cache)), 2)
+        self.assertIsNone(station_cache.get((0, )))
+        self.assertIsNone(station_cache.get((1, )))
+        self.assertEqual(station_cache.get((3, )), b'x' * 100000)
+
+    def test_invalidate(self):
+        station_cache = StationCache('versions', cache_dir=self.cache_dir)
+        station_cache.set(('A', ), 'old')
+        self.assertEqual(station_cache.get(('A', )), 'old')
+
+        # A new data version hides the entries of every worker
+        cache.bump_data_version(self.cache_dir)
+        self.assertIsNone(station_cache.get(('A', )))
+        station_cache.set(('A', ), 'new')
+
+        # invalidate also removes the files of the previous versions
+        version = cache.invalidate(self.cache_dir)
+        self.assertIsNone(station_cache.get(('A', )))
+        self.assertTrue(all(name.startswith(version + '_') for name in self.files(station_cache)))
+
+    def test_get_or_compute(self):
+        station_cache = StationCache('compute', cache_dir=self.cache_dir)
+        calls = []
+        barrier = threading.Barrier(4)
+
+        def compute():
+            calls.append(1)
+            return 'value'
+
+        def run():
+            barrier.wait()
+            station_cache.get_or_compute(('A', ), compute)
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+
+        # The locks do not grow with the keys
+        for n in range(1000):
+            station_cache.get_or_compute((n, ), lambda: n)
+        self.assertEqual(len(station_cache._key_locks), cache.KEY_LOCKS)
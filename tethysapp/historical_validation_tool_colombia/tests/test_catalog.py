@@ -0,0 +1,103 @@
+import json
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import catalog
+from tethysapp.historical_validation_tool_colombia.cache import bump_alerts_version, bump_data_version
+
+
+class StationCatalogTestCase(TethysTestCase):
+
+    def set_up(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.stations = pd.DataFrame({
+            'codigo': ['21237010', '35027001'],
+            'name': ['PTE BALSEADERO', 'PTE LLERAS'],
+            'latitude': [2.63, 4.1],
+            'longitude': [-75.67, -73.2],
+            'altitud': [1000, np.nan],
+            'comid': [9007721, 9021044],
+            'stream_nam': ['Magdalena', None],
+            'zona_hidrografica': ['Alto Magdalena', 'Meta'],
+            'area_operativa': ['AO1', 'AO2'],
+            'area_hidrografica': ['Magdalena', 'Orinoco'],
+            'departamento': ['Huila', 'Meta'],
+            'alert': ['R0', 'R2'],
+            'concat': ['21237010 - PTE BALSEADERO', '35027001 - PTE LLERAS'],
+        })
+        self.loads = 0
+        self.table = 'table-1'
+
+    def tear_down(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def load(self):
+        self.loads += 1
+        return self.stations
+
+    def fingerprint(self):
+        if isinstance(self.table, Exception):
+            raise self.table
+        return self.table
+
+    def test_catalog_content(self):
+        data = catalog.build_catalog(self.stations)
+        feature = data['features'][1]
+
+        self.assertEqual(len(data['features']), 2)
+        self.assertEqual(feature['geometry'], {'type': 'Point', 'coordinates': [-73.2, 4.1]})
+        self.assertEqual(list(feature['properties']), catalog.CATALOG_PROPERTIES)
+        self.assertEqual(feature['properties']['code'], '35027001')
+        self.assertEqual(feature['properties']['basin'], 'Meta')
+        self.assertEqual(feature['properties']['elevation'], 'nan')
+        self.assertEqual(feature['properties']['river'], 'None')
+        self.assertEqual(feature['properties']['comid'], '9021044')
+        self.assertEqual(feature['properties']['latitude'], 4.1)
+        self.assertEqual(json.loads(catalog.serialize(data)), data)
+
+    def test_rebuilt_on_new_versions(self):
+        station_catalog = catalog.StationCatalog(load=self.load, cache_dir=self.cache_dir, fingerprint=self.fingerprint)
+        body, etag = station_catalog.get()
+        self.assertEqual(station_catalog.get(), (body, etag))
+        self.assertEqual(self.loads, 1)
+
+        self.stations.loc[0, 'alert'] = 'R5'
+        bump_alerts_version(self.cache_dir)
+        new_body, new_etag = station_catalog.get()
+        self.assertEqual(self.loads, 2)
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual(json.loads(new_body)['features'][0]['properties']['alert'], 'R5')
+
+        bump_data_version(self.cache_dir)
+        self.assertEqual(station_catalog.get(), (new_body, new_etag))
+        self.assertEqual(self.loads, 3)
+
+    def test_rebuilt_on_outside_writes(self):
+        station_catalog = catalog.StationCatalog(load=self.load, cache_dir=self.cache_dir,
+                                                 fingerprint=self.fingerprint, check_seconds=0)
+        body, etag = station_catalog.get()
+        self.assertEqual(station_catalog.get(), (body, etag))
+        self.assertEqual(self.loads, 1)
+
+        # Alerts written by another process, without a new alerts version
+        self.stations.loc[1, 'alert'] = 'R10'
+        self.table = 'table-2'
+        new_body, new_etag = station_catalog.get()
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(json.loads(new_body)['features'][1]['properties']['alert'], 'R10')
+
+        # The catalog is kept when the table can not be checked
+        self.table = IOError('database down')
+        self.assertEqual(station_catalog.get(), (new_body, new_etag))
+        self.assertEqual(self.loads, 2)
+
+        # Between checks the table is not read
+        station_catalog.check_seconds = 3600
+        self.table = 'table-3'
+        self.assertEqual(station_catalog.get(), (new_body, new_etag))
+        self.assertEqual(self.loads, 2)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import downsampling
+
+
+class DownsamplingTestCase(TethysTestCase):
+
+    def set_up(self):
+        rng = np.random.default_rng(0)
+        index = pd.date_range('1980-01-01', '2022-05-31', freq='D')
+        self.series = pd.Series(np.abs(np.cumsum(rng.normal(size=index.size))) + 1, index=index)
+
+    def test_budget_and_extremes(self):
+        result = downsampling.downsample(self.series, 1000)
+
+        self.assertEqual(len(result), 1000)
+        self.assertEqual(result.index[0], self.series.index[0])
+        self.assertEqual(result.index[-1], self.series.index[-1])
+        self.assertEqual(result.max(), self.series.max())
+        self.assertTrue(result.index.is_monotonic_increasing)
+
+    def test_gaps_are_kept(self):
+        series = self.series.copy()
+        series.iloc[5000:5400] = np.nan
+        result = downsampling.downsample(series, 1000)
+
+        gaps = result[result.isna()]
+        self.assertEqual(len(gaps), 1)
+        self.assertTrue(series.index[5000] <= gaps.index[0] < series.index[5400])
+
+    def test_short_series_are_not_changed(self):
+        window = downsampling.window(self.series, '2000-01-01', '2000-12-31')
+        result = downsampling.downsample(window, 1000)
+
+        self.assertTrue(result.equals(window))
@@ -0,0 +1,94 @@
+import time
+import shutil
+import tempfile
+import threading
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import evaluator, fanout
+from tethysapp.historical_validation_tool_colombia.cache import StationCache
+
+
+class AnalysisGraphTestCase(TethysTestCase):
+
+    def set_up(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = StationCache(namespace='nodes', cache_dir=self.cache_dir)
+        self.calls = []
+        self.graph = evaluator.AnalysisGraph(key=lambda p: (p['code'], ))
+        self.graph.add('observed', lambda p: self.call('observed', p['code'] + '-obs'), cache=self.cache, source=True)
+        self.graph.add('simulated', lambda p: self.call('simulated', p['code'] + '-sim'), cache=self.cache, source=True)
+        self.graph.add('corrected', lambda p, sim, obs: self.call('corrected', sim + '+' + obs),
+                       deps=['simulated', 'observed'], cache=self.cache)
+        self.graph.add('thresholds', lambda p, cor: self.call('thresholds', 'max ' + cor), deps=['corrected'])
+        self.graph.add('forecast', lambda p: self.call('forecast', 1 / p.get('members', 0)), source=True)
+        self.graph.add('fews', lambda p: self.call('fews', p['fews']), source=True, fallback=lambda: 'no fews')
+
+    def tear_down(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def call(self, name, value):
+        self.calls.append(name)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def test_only_needed_nodes(self):
+        result = self.graph.evaluate(['simulated'], code='A')
+        self.assertEqual(result, {'simulated': 'A-sim'})
+        self.assertEqual(self.calls, ['simulated'])
+
+        result = self.graph.evaluate(['thresholds', 'observed'], code='A')
+        self.assertEqual(result, {'thresholds': 'max A-sim+A-obs', 'observed': 'A-obs'})
+        self.assertEqual(sorted(self.calls), ['corrected', 'observed', 'simulated', 'thresholds'])
+
+        # The cached node stops the walk, its dependencies are not read again
+        self.calls = []
+        self.assertEqual(self.graph.evaluate(['thresholds'], code='A'), {'thresholds': 'max A-sim+A-obs'})
+        self.assertEqual(self.calls, ['thresholds'])
+        self.graph.evaluate(['corrected'], code='B')
+        self.assertEqual(sorted(self.calls), ['corrected', 'observed', 'simulated', 'thresholds'])
+
+        with self.assertRaises(ValueError):
+            self.graph.evaluate(['unknown'], code='A')
+        with self.assertRaises(ValueError):
+            self.graph.add('other', lambda p, x: x, deps=['unknown'])
+
+    def test_independent_nodes_in_parallel(self):
+        barrier = threading.Barrier(2, timeout=5)
+        graph = evaluator.AnalysisGraph(key=lambda p: ())
+        graph.add('a', lambda p: barrier.wait() is not None and 'a')
+        graph.add('b', lambda p: barrier.wait() is not None and 'b')
+        graph.add('ab', lambda p, a, b: a + b, deps=['a', 'b'])
+        self.assertEqual(graph.evaluate(['ab']), {'ab': 'ab'})
+        self.assertIn('ab', evaluator.get_node_stats())
+
+    def test_failed_sources(self):
+        result = self.graph.evaluate(['fews', 'observed'], code='A', fews=IOError('timeout'))
+        self.assertEqual(result, {'fews': 'no fews', 'observed': 'A-obs'})
+
+        with self.assertRaises(fanout.SourceError) as error:
+            self.graph.evaluate(['forecast', 'fews'], code='A', fews='ok')
+        self.assertEqual(error.exception.name, 'forecast')
+
+        # Failed values are not cached
+        self.observed = IOError('database down')
+        graph = evaluator.AnalysisGraph(key=lambda p: ('C', ))
+        graph.add('observed', lambda p: self.call('observed', self.observed), cache=self.cache, source=True)
+        with self.assertRaises(fanout.SourceError):
+            graph.evaluate(['observed'])
+        self.observed = 'C-obs'
+        self.assertEqual(graph.evaluate(['observed']), {'observed': 'C-obs'})
+
+    def test_timeout_of_a_single_source(self):
+        release = threading.Event()
+        graph = evaluator.AnalysisGraph(key=lambda p: ())
+        graph.add('slow', lambda p: release.wait(5) and 'slow', source=True, timeout=0.2, fallback='fallback')
+        graph.add('fast', lambda p: 'fast', source=True)
+
+        # Alone or with other sources, the timeout and the fallback apply
+        for outputs in (['slow'], ['slow', 'fast']):
+            start = time.monotonic()
+            self.assertEqual(graph.evaluate(outputs)['slow'], 'fallback')
+            self.assertLess(time.monotonic() - start, 2)
+        release.set()
@@ -0,0 +1,68 @@
+import io
+import zipfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy.io import netcdf_file
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import exports
+
+
+class ExportTestCase(TethysTestCase):
+
+    def set_up(self):
+        index = pd.date_range('1990-01-01', periods=2500, freq='D', name='datetime')
+        self.data = pd.DataFrame({'Historical simulation (m3/s)': np.linspace(0, 100, 2500)}, index=index)
+        self.stats = pd.DataFrame({'mean (m3/s)': np.arange(10.0), 'max (m3/s)': np.arange(10.0) * 2},
+                                  index=index[:10])
+
+    def tear_down(self):
+        pass
+
+    def read(self, body):
+        return body.read() if hasattr(body, 'read') else b''.join(body)
+
+    def test_csv_in_chunks(self):
+        content_type, extension, body = exports.export([('serie', self.data)], 'csv')
+        self.assertEqual((content_type, extension), ('text/csv', '.csv'))
+        chunks = list(exports.csv_chunks(self.data, chunk_rows=1000))
+        self.assertEqual(len(chunks), 4)
+
+        data = pd.read_csv(io.BytesIO(self.read(body)), index_col=0, parse_dates=True)
+        pd.testing.assert_frame_equal(data, self.data, check_freq=False)
+
+    def test_several_sheets_in_a_zip(self):
+        sheets = [('ensemble_stats', self.stats), ('ensemble_forecast', self.data)]
+        content_type, extension, body = exports.export(sheets, 'csv')
+        self.assertEqual((content_type, extension), exports.ZIP_FORMAT)
+        with zipfile.ZipFile(io.BytesIO(self.read(body))) as archive:
+            self.assertEqual(archive.namelist(), ['ensemble_stats.csv', 'ensemble_forecast.csv'])
+            data = pd.read_csv(archive.open('ensemble_stats.csv'), index_col=0, parse_dates=True)
+        pd.testing.assert_frame_equal(data, self.stats, check_freq=False)
+
+    def test_netcdf(self):
+        sheets = [('stats', self.stats), ('serie', self.data)]
+        content_type, extension, body = exports.export(sheets, 'netcdf')
+        self.assertEqual(extension, '.nc')
+        dataset = netcdf_file(io.BytesIO(self.read(body)), 'r', mmap=False)
+        variable = dataset.variables['serie_Historical_simulation_m3_s']
+        self.assertEqual(variable.long_name, b'Historical simulation (m3/s)')
+        np.testing.assert_allclose(variable[:], self.data.iloc[:, 0].values, rtol=1e-6)
+        time = dataset.variables['stats_datetime']
+        self.assertEqual(time[1] - time[0], 86400)
+        self.assertEqual(time.units, b'seconds since 1970-01-01 00:00:00')
+        dataset.close()
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            exports.export([('serie', self.data)], 'json')
+
+    @unittest.skipIf(exports.pyarrow is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        content_type, extension, body = exports.export([('serie', self.data)], 'parquet')
+        self.assertEqual(extension, '.parquet')
+        data = pd.read_parquet(io.BytesIO(self.read(body)))
+        pd.testing.assert_frame_equal(data, self.data, check_freq=False)
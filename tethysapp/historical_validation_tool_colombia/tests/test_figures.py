@@ -0,0 +1,55 @@
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import figures
+
+
+def decode(value):
+    dtype = {'f4': '<f4', 'i8': '<i8'}[value['dtype']]
+    return np.frombuffer(base64.b64decode(value['bdata']), dtype=dtype)
+
+
+class FiguresTestCase(TethysTestCase):
+
+    def set_up(self):
+        self.index = pd.date_range('2023-01-01', periods=200, freq='3h', tz='UTC')
+        self.values = np.linspace(0, 1000, self.index.size)
+        self.values[10] = np.nan
+        self.figure = go.Figure([
+            go.Scatter(x=self.index, y=self.values, name='Caudal <b>'),
+            go.Scatter(x=[self.index[0], self.index[-1]], y=[5, None]),
+            go.Bar(x=['Ene', 'Feb'], y=[1, 2]),
+        ])
+
+    def test_typed_arrays(self):
+        payload = figures.to_payload(self.figure)
+        trace = payload['data'][0]
+
+        dates = pd.to_datetime(decode(trace['x']), unit='ms')
+        self.assertTrue((dates == self.index.tz_localize(None)).all())
+        np.testing.assert_allclose(decode(trace['y']), self.values, rtol=1e-6)
+        np.testing.assert_array_equal(decode(payload['data'][1]['y']), [5, np.nan])
+        self.assertEqual(payload['data'][2]['x'], ('Ene', 'Feb'))
+        self.assertEqual(payload['layout']['xaxis']['type'], 'date')
+
+    def test_shared_template(self):
+        payload = figures.to_payload(self.figure)
+        self.assertEqual(payload['template'], 'plotly')
+        self.assertNotIn('template', payload['layout'])
+
+        self.figure.update_layout(template='plotly_dark')
+        payload = figures.to_payload(self.figure)
+        self.assertIsNone(payload['template'])
+        self.assertIn('template', payload['layout'])
+
+    def test_dumps_is_safe_in_templates(self):
+        text = figures.dumps({'plot': figures.to_payload(self.figure)})
+
+        self.assertNotIn('<', text)
+        self.assertEqual(json.loads(text)['plot']['data'][0]['name'], 'Caudal <b>')
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia.geoglows_api import GeoglowsClient, GeoglowsAPIError
+
+
+ENSEMBLE_CSV = ('datetime,ensemble_01_m^3/s,ensemble_52_m^3/s\n'
+                '2023-01-01 00:00:00+00:00,10.5,11.0\n'
+                '2023-01-01 03:00:00+00:00,-1.0,12.0\n')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    '''Local stand-in of the GEOGLOWS API. The first `failures` requests get a 503'''
+    failures = 0
+    requests = []
+
+    def do_GET(self):
+        StandInHandler.requests.append(self.path)
+        if StandInHandler.failures > 0:
+            StandInHandler.failures -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        if not self.path.startswith('/ForecastEnsembles/'):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = ENSEMBLE_CSV.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GeoglowsClientTestCase(TethysTestCase):
+
+    def set_up(self):
+        StandInHandler.failures = 0
+        StandInHandler.requests = []
+        self.server = HTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.cache_dir = tempfile.mkdtemp()
+        self.client = GeoglowsClient(
+            base_url='http://127.0.0.1:{0}'.format(self.server.server_port),
+            cache_dir=self.cache_dir, timeout=(2, 2), retries=2, backoff=0.01)
+
+    def tear_down(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_past_dates_are_cached(self):
+        first = self.client.forecast_ensembles(9007721, '20230101')
+        second = self.client.forecast_ensembles(9007721, '20230101')
+
+        self.assertEqual(len(StandInHandler.requests), 1)
+        self.assertEqual(list(first.columns), ['ensemble_01_m^3/s', 'ensemble_52_m^3/s'])
+        self.assertTrue(first.equals(second))
+
+    def test_cache_size_is_bounded(self):
+        size = len(ENSEMBLE_CSV.encode('utf-8'))
+        client = GeoglowsClient(base_url=self.client.base_url, cache_dir=self.cache_dir, timeout=(2, 2),
+                                retries=0, cache_mb=2.5 * size / (1024 * 1024))
+        for day in range(1, 5):
+            client.forecast_ensembles(9007721, '202301{0:02d}'.format(day))
+        client.close()
+
+        files = [name for _, _, names in os.walk(self.cache_dir) for name in names]
+        self.assertEqual(len(files), 2)
+
+    def test_server_errors_are_retried(self):
+        StandInHandler.failures = 2
+        data = self.client.forecast_ensembles(9007721, '20230101')
+
+        self.assertEqual(len(StandInHandler.requests), 3)
+        self.assertEqual(len(data.index), 2)
+
+    def test_retries_are_bounded(self):
+        StandInHandler.failures = 10
+        with self.assertRaises(GeoglowsAPIError):
+            self.client.forecast_ensembles(9007721, '20230101')
+
+        self.assertEqual(len(StandInHandler.requests), 3)
+
+    def test_client_errors_are_not_retried(self):
+        with self.assertRaises(GeoglowsAPIError):
+            self.client.forecast_records(9007721, '20230101')
+
+        self.assertEqual(len(StandInHandler.requests), 1)
@@ -0,0 +1,66 @@
+import json
+import os
+import shutil
+import tempfile
+
+import shapely
+from shapely.geometry import shape
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import geometry
+
+
+class GeometryTestCase(TethysTestCase):
+
+    def set_up(self):
+        self.geometry_dir = tempfile.mkdtemp()
+
+    def tear_down(self):
+        shutil.rmtree(self.geometry_dir, ignore_errors=True)
+
+    def test_levels_are_simplified_and_quantized(self):
+        source = geometry.source_path('hydr_zone', '13_Sinu.json')
+        with open(source, encoding='utf-8') as f:
+            original = shape(json.load(f)['features'][0]['geometry'])
+
+        sizes = geometry.build_file('hydr_zone', '13_Sinu.json', self.geometry_dir)
+        self.assertEqual(len(sizes), len(geometry.GEOMETRY_LEVELS))
+        self.assertEqual(sizes, sorted(sizes))
+
+        points = []
+        for level, (max_zoom, tolerance, decimals) in enumerate(geometry.GEOMETRY_LEVELS):
+            with open(geometry.level_path('hydr_zone', '13_Sinu.json', level, self.geometry_dir)) as f:
+                collection = json.load(f)
+            self.assertEqual(collection['max_zoom'], max_zoom)
+            simplified = shape(collection['features'][0]['geometry'])
+            self.assertTrue(simplified.is_valid)
+            self.assertLess(shapely.hausdorff_distance(original, simplified), 10 * tolerance)
+            x, y = simplified.exterior.coords[0]
+            self.assertEqual(round(x, decimals), x)
+            points.append(shapely.get_num_coordinates(simplified))
+        self.assertEqual(points, sorted(points))
+        self.assertLess(points[-1], shapely.get_num_coordinates(original))
+
+    def test_up_to_date_levels_are_not_rebuilt(self):
+        geometry.build_file('hydr_zone', '13_Sinu.json', self.geometry_dir)
+        sizes = geometry.build_file('hydr_zone', '13_Sinu.json', self.geometry_dir)
+        self.assertEqual(sizes, [None] * len(geometry.GEOMETRY_LEVELS))
+
+    def test_file_for_zoom(self):
+        geometry.build_file('hydr_zone', '13_Sinu.json', self.geometry_dir)
+
+        path = geometry.get_geometry_file('hydr_zone', '13_Sinu.json', 5, self.geometry_dir)
+        self.assertEqual(path, geometry.level_path('hydr_zone', '13_Sinu.json', 0, self.geometry_dir))
+        path = geometry.get_geometry_file('hydr_zone', '13_Sinu.json', 15, self.geometry_dir)
+        self.assertEqual(path, geometry.level_path('hydr_zone', '13_Sinu.json', len(geometry.GEOMETRY_LEVELS) - 1, self.geometry_dir))
+        # Levels that were not built are served at full resolution
+        path = geometry.get_geometry_file('hydr_zone', '12_Caribe_Litoral.json', 5, self.geometry_dir)
+        self.assertEqual(path, os.path.join(geometry.SOURCE_DIR, 'hydr_zone', '12_Caribe_Litoral.json'))
+
+        with self.assertRaises(ValueError):
+            geometry.get_geometry_file('hydr_zone', '../dep/Choco.json', 5, self.geometry_dir)
+        with self.assertRaises(ValueError):
+            geometry.get_geometry_file('basin', 'guayas.geojson', 5, self.geometry_dir)
+        with self.assertRaises(FileNotFoundError):
+            geometry.get_geometry_file('dep', 'COLOMBIA.json', 5, self.geometry_dir)
@@ -0,0 +1,100 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from unittest import mock
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import controllers, renderer
+from tethysapp.historical_validation_tool_colombia.cache import StationCache, bump_data_version
+
+
+def hang(figure):
+    # Renderer that never finishes
+    time.sleep(600)
+
+
+class StationImageTestCase(TethysTestCase):
+
+    def set_up(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.image_cache = StationCache(namespace='station_images', cache_dir=self.cache_dir)
+        self.figures = []
+        self.cycle = '2024-05-06 00:00:00'
+
+    def tear_down(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def get_image_figure(self, station_code, station_comid, station_name, type_graph):
+        self.figures.append(type_graph)
+        return {'graph': type_graph, 'number': len(self.figures)}
+
+    def render(self, figure):
+        return '{graph}-{number}'.format(**figure).encode('utf-8')
+
+    def get_image(self, type_graph):
+        return controllers.get_station_image('21237010', '9007721', 'PTE BALSEADERO', type_graph, render=self.render)
+
+    def test_cached_by_graph_and_cycle(self):
+        with mock.patch.object(controllers, 'image_cache', self.image_cache), \
+                mock.patch.object(controllers, 'get_image_figure', self.get_image_figure), \
+                mock.patch.object(controllers.database, 'get_forecast_cycle', lambda comid: self.cycle):
+            self.assertEqual(self.get_image('historical'), b'historical-1')
+            self.assertEqual(self.get_image('forecast'), b'forecast-2')
+            self.assertEqual(self.get_image('historical'), b'historical-1')
+            self.assertEqual(self.get_image('forecast'), b'forecast-2')
+
+            # New forecast cycle, only the forecast is rendered again
+            self.cycle = '2024-05-07 00:00:00'
+            self.assertEqual(self.get_image('forecast'), b'forecast-3')
+            self.assertEqual(self.get_image('historical'), b'historical-1')
+
+            # New data version, all the images are rendered again
+            bump_data_version(self.cache_dir)
+            self.assertEqual(self.get_image('historical'), b'historical-4')
+        self.assertEqual(self.figures, ['historical', 'forecast', 'forecast', 'historical'])
+
+    def test_renderer_queue_is_bounded(self):
+        pool = renderer.RendererPool(workers=1, queue=1)
+        started = threading.Barrier(3)
+        release = threading.Event()
+
+        def result(timeout):
+            # Both slots are taken until the third image is refused
+            started.wait()
+            release.wait()
+            return b'png'
+
+        class Executor:
+            def submit(self, function, figure):
+                return mock.Mock(result=result)
+
+        results = []
+        with mock.patch.object(pool, '_get_executor', Executor):
+            threads = [threading.Thread(target=lambda: results.append(pool.render({'data': []}))) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            started.wait()
+            with self.assertRaises(renderer.RendererBusy):
+                pool.render({'data': []})
+            release.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results, [b'png', b'png'])
+
+    def test_timed_out_renderer_is_terminated(self):
+        pool = renderer.RendererPool(workers=1, queue=0, timeout=0.5)
+        executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork'))
+        pid = executor.submit(os.getpid).result()
+        processes = list(executor._processes.values())
+        self.assertEqual([process.pid for process in processes], [pid])
+
+        with mock.patch.object(pool, '_get_executor', lambda: executor), \
+                mock.patch.object(renderer, 'to_png', hang):
+            with self.assertRaises(TimeoutError):
+                pool.render({'data': []})
+        self.assertFalse(processes[0].is_alive())
@@ -0,0 +1,51 @@
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import hydrostats as hs
+import hydrostats.data as hd
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import metrics
+
+
+class MetricsEngineTestCase(TethysTestCase):
+
+    def set_up(self):
+        rng = np.random.default_rng(0)
+        index = pd.date_range('2000-01-01', periods=2000, freq='D')
+        observed = pd.DataFrame({'s_21237010': 50 * rng.lognormal(size=index.size)}, index=index)
+        observed.iloc[5, 0] = np.nan
+        simulated = pd.DataFrame({'streamflow_m^3/s': 55 * rng.lognormal(size=index.size)}, index=index)
+        corrected = pd.DataFrame({'Corrected Simulated Streamflow': 52 * rng.lognormal(size=index.size)}, index=index)
+        self.merged = {
+            'simulated': hd.merge_data(sim_df=simulated, obs_df=observed),
+            'corrected': hd.merge_data(sim_df=corrected, obs_df=observed),
+        }
+        self.my_metrics = metrics.DEFAULT_METRICS + ['MAE', 'MASE', 'd (Mod.)', 'H6 (AHE)', "E1'"]
+
+    def test_metrics_match_hydrostats(self):
+        result, _ = metrics.compute_metrics(self.merged, self.my_metrics)
+
+        for series in metrics.SERIES:
+            expected = hs.make_table(self.merged[series], self.my_metrics).iloc[0]
+            values = [result['series'][series][m] for m in self.my_metrics]
+            np.testing.assert_allclose(values, expected.values, rtol=1e-12)
+
+    def test_only_new_metrics_are_computed(self):
+        _, known = metrics.compute_metrics(self.merged, metrics.DEFAULT_METRICS)
+
+        with mock.patch.object(metrics, 'evaluate', wraps=metrics.evaluate) as evaluate:
+            result, updated = metrics.compute_metrics(self.merged, metrics.DEFAULT_METRICS + ['MAE'], known)
+            self.assertEqual([c.args[2] for c in evaluate.call_args_list], [['MAE'], ['MAE']])
+
+            _, unchanged = metrics.compute_metrics(self.merged, ['MAE', 'NSE'], updated)
+            self.assertIsNone(unchanged)
+            self.assertEqual(evaluate.call_count, 2)
+
+        self.assertEqual(result['metrics'], metrics.DEFAULT_METRICS + ['MAE'])
+
+    def test_unknown_metric(self):
+        with self.assertRaises(ValueError):
+            metrics.compute_metrics(self.merged, ['NSE', 'not a metric'])
@@ -0,0 +1,47 @@
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import database
+
+
+class ObservedStorageTestCase(TethysTestCase):
+
+    def set_up(self):
+        # The wide and long tables in a local database, the statements are plain SQL
+        self.engine = create_engine('sqlite://')
+        dates = pd.date_range('2000-01-01', periods=6, freq='D').strftime('%Y-%m-%d %H:%M:%S')
+        wide = pd.DataFrame({'datetime': dates,
+                             's_21237010': [1.5, np.nan, np.nan, 4.0, 5.0, np.nan],
+                             's_35027001': [np.nan, 2.0, 3.0, np.nan, np.nan, 6.0]})
+        with self.engine.begin() as conn:
+            wide.to_sql('observed_streamflow_data', conn, index=False)
+            conn.execute(text('create table observed_streamflow (station_code text not null, '
+                              'datetime timestamp not null, value double precision, '
+                              'primary key (station_code, datetime))'))
+
+    def tear_down(self):
+        self.engine.dispose()
+
+    def read(self, storage, station_code):
+        with mock.patch.object(database, 'OBSERVED_STORAGE', storage), \
+                mock.patch.object(database, 'SERIES_LOADER', 'sql'), \
+                self.engine.connect() as conn:
+            return database.get_observed_data(station_code, conn)
+
+    def test_long_table_keeps_the_gaps(self):
+        for station_code in ['21237010', '35027001']:
+            # Same rows migrate_observed_station copies (the dates without data too)
+            with self.engine.begin() as conn:
+                conn.execute(text('insert into observed_streamflow (station_code, datetime, value) '
+                                  'select :station_code, datetime, s_{0} from observed_streamflow_data '
+                                  'where datetime is not null'.format(station_code)), {'station_code': station_code})
+
+            wide = self.read('wide', station_code)
+            long = self.read('long', station_code)
+            self.assertEqual(int(wide.iloc[:, 0].isna().sum()), 3)
+            pd.testing.assert_frame_equal(long, wide)
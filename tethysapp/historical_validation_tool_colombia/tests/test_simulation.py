@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import simulation
+
+
+def series(start, periods, column='streamflow_m^3/s'):
+    dates = pd.date_range(start, periods=periods, freq='D', name='datetime')
+    return pd.DataFrame({column: np.arange(periods, dtype=float) + 0.5}, index=dates)
+
+
+class SimulationMatrixTestCase(TethysTestCase):
+
+    def set_up(self):
+        self.simulation_dir = tempfile.mkdtemp()
+        gap = series('1980-01-01', 10)
+        self.series = {
+            '9007721': series('1980-01-01', 20),
+            '9021044': series('1980-01-05', 10, column='flow'),
+            '9035000': gap.drop(gap.index[4]),
+        }
+
+    def tear_down(self):
+        shutil.rmtree(self.simulation_dir, ignore_errors=True)
+
+    def test_read_written_series(self):
+        written, skipped = simulation.write_matrix(self.series, self.simulation_dir)
+        self.assertEqual(written, ['9007721', '9021044'])
+        self.assertEqual(skipped, ['9035000'])
+
+        matrix = simulation.SimulationMatrix(self.simulation_dir)
+        for comid in written:
+            data = matrix.get(comid)
+            self.assertEqual(data.dtypes.tolist(), [np.float32])
+            pd.testing.assert_frame_equal(data, self.series[comid].astype(np.float32), check_freq=False)
+        self.assertIsNone(matrix.get('9035000'))
+        self.assertNotIn('9035000', matrix)
+
+        # The rows are copies of the shared mapping
+        data = matrix.get('9007721')
+        data.iloc[0, 0] = -1
+        self.assertEqual(matrix.get('9007721').iloc[0, 0], 0.5)
+
+    def test_reload_new_matrix(self):
+        matrix = simulation.SimulationMatrix(self.simulation_dir)
+        self.assertIsNone(matrix.get('9007721'))
+
+        simulation.write_matrix(self.series, self.simulation_dir)
+        self.assertEqual(len(matrix.get('9007721').index), 20)
+
+        self.series['9007721'] = series('1979-12-30', 5)
+        simulation.write_matrix(self.series, self.simulation_dir)
+        os.utime(os.path.join(self.simulation_dir, simulation.INDEX_FILE), ns=(1, 1))
+        self.assertEqual(matrix.get('9007721').index[0], pd.Timestamp('1979-12-30'))
+        self.assertEqual(len(matrix.get('9021044').index), 10)
+        self.assertEqual(len([name for name in os.listdir(self.simulation_dir) if name.endswith('.npy')]), 1)
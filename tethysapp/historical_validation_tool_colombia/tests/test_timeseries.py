@@ -0,0 +1,78 @@
+import struct
+
+import numpy as np
+import pandas as pd
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import timeseries
+
+
+def copy_stream(microseconds, values):
+    '''Binary COPY stream of a copy_statement query'''
+    stream = timeseries.COPY_HEADER.pack(timeseries.COPY_SIGNATURE, 0, 0)
+    for date, row in zip(microseconds, values):
+        stream += struct.pack('>hiq', len(row) + 1, 8, date)
+        stream += b''.join(struct.pack('>id', 8, value) for value in row)
+    return stream + timeseries.COPY_TRAILER
+
+
+def round_trip(index):
+    '''Formatting the get_format_data loader used before'''
+    index = pd.to_datetime(index)
+    return pd.to_datetime(index.to_series().dt.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+class TimeSeriesTestCase(TethysTestCase):
+
+    def set_up(self):
+        dates = pd.DatetimeIndex(['1965-03-01 00:00:00.75', '1999-12-31 23:59:59.999999', '2000-01-01',
+                                  '2024-05-06 12:30:15.5'])
+        self.dates = dates
+        self.microseconds = ((dates - pd.Timestamp('2000-01-01')) // pd.Timedelta(microseconds=1)).tolist()
+        self.values = [[1.5, 10.0], [np.nan, 20.25], [3.0, np.nan], [4.125, 40.0]]
+
+    def test_same_dates_as_strftime(self):
+        index = timeseries.to_datetime_index(self.microseconds)
+        self.assertTrue(index.equals(pd.DatetimeIndex(round_trip(self.dates).to_numpy())))
+        self.assertEqual(index.name, 'datetime')
+
+        # Nulls are sent as -infinity
+        index = timeseries.to_datetime_index([timeseries.PG_INFINITY[0], 0])
+        self.assertTrue(pd.isna(index[0]))
+        self.assertEqual(index[1], pd.Timestamp('2000-01-01'))
+
+    def test_format_index(self):
+        for dates in [self.dates, self.dates.tz_localize('America/Bogota')]:
+            data = pd.DataFrame({'value': np.arange(len(dates))}, index=dates)
+            expected = round_trip(data.index)
+            self.assertEqual(timeseries.format_index(data).index.tolist(), expected.tolist())
+
+    def test_read_copy_stream(self):
+        stream = copy_stream(self.microseconds, self.values)
+        expected = None
+        for chunk_rows in [None, 1, 3]:
+            reader = timeseries.BinaryCopyReader(['s_1', 's_2'], chunk_rows=chunk_rows)
+            for start in range(0, len(stream), 7):
+                reader.write(stream[start:start + 7])
+            data = reader.result()
+            self.assertEqual(list(data.columns), ['s_1', 's_2'])
+            self.assertEqual(data.dtypes.tolist(), [np.float32, np.float32])
+            np.testing.assert_array_equal(data.to_numpy(), np.array(self.values, dtype=np.float32))
+            if expected is not None:
+                self.assertTrue(data.equals(expected))
+            expected = data
+
+        reader = timeseries.BinaryCopyReader(['s_1', 's_2'])
+        reader.write(stream[:-1])
+        with self.assertRaises(ValueError):
+            reader.result()
+
+    def test_copy_statement(self):
+        sql = 'select * from hs_9007721'
+        statement = timeseries.copy_statement(sql, [('datetime', 1184), ('streamflow_m^3/s', 700)])
+        self.assertEqual(statement, 'copy (select coalesce(("datetime" at time zone \'UTC\'), \'-infinity\'), '
+                                    'coalesce("streamflow_m^3/s"::float8, \'NaN\') from (select * from hs_9007721) as q) '
+                                    'to stdout with (format binary)')
+        self.assertIsNone(timeseries.copy_statement(sql, [('datetime', 1114), ('name', 25)]))
+        self.assertIsNone(timeseries.copy_statement(sql, [('date', 1114), ('value', 701)]))
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import pandas as pd
+import shapely
+
+from tethys_sdk.testing import TethysTestCase
+
+from tethysapp.historical_validation_tool_colombia import catalog, zones
+from tethysapp.historical_validation_tool_colombia.cache import bump_alerts_version, bump_zones_version
+
+
+def square(x, y, size):
+    return {'type': 'Polygon', 'coordinates': [[[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]]}
+
+
+class ZonesTestCase(TethysTestCase):
+
+    def set_up(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.source_dir, 'dep'))
+        # Two neighbour zones, the second one with two features
+        zone_features = {'Norte': [square(0, 1, 1)], 'Sur': [square(0, 0, 1), square(1, 0, 1)]}
+        for name, polygons in zone_features.items():
+            with open(os.path.join(self.source_dir, 'dep', name + '.json'), 'w') as f:
+                json.dump({'type': 'FeatureCollection', 'features': [
+                    {'type': 'Feature', 'properties': {}, 'geometry': polygon} for polygon in polygons]}, f)
+
+        columns = ['codigo', 'name', 'latitude', 'longitude', 'altitud', 'comid', 'stream_nam',
+                   'zona_hidrografica', 'area_operativa', 'area_hidrografica', 'departamento', 'alert', 'concat']
+        rows = [[code, code, lat, lon, 0, 1, '', '', '', '', '', 'R0', code]
+                for code, lon, lat in [('A', 0.5, 1.5), ('B', 0.5, 0.5), ('C', 1.5, 0.5), ('D', 5, 5), ('E', 1, 1)]]
+        self.stations = pd.DataFrame(rows, columns=columns)
+        self.zone_index = zones.ZoneIndex(source_dir=self.source_dir, layers=('dep',))
+        self.station_catalog = catalog.StationCatalog(load=lambda: self.stations, cache_dir=self.cache_dir,
+                                                      fingerprint=None)
+        self.membership = None
+        self.station_filter = zones.StationFilter(self.station_catalog, self.zone_index,
+                                                  load_membership=lambda: self.membership, cache_dir=self.cache_dir)
+
+    def tear_down(self):
+        shutil.rmtree(self.source_dir, ignore_errors=True)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def codes(self, body):
+        return [f['properties']['code'] for f in json.loads(body)['features']]
+
+    def test_zones_of_points(self):
+        points = shapely.points([[0.5, 1.5], [1.5, 0.5], [5, 5], [0.5, 1]])
+        self.assertEqual(self.zone_index.zones_of('dep', points), ['Norte', 'Sur', None, 'Norte'])
+
+    def test_filter_by_zone_and_bbox(self):
+        body, etag = self.station_filter.filter(layer='dep', zone='Sur')
+        self.assertEqual(self.codes(body), ['B', 'C', 'E'])
+
+        body, _ = self.station_filter.filter(bbox='1.2,0,10,10')
+        self.assertEqual(self.codes(body), ['C', 'D'])
+
+        body, other_etag = self.station_filter.filter(layer='dep', zone='Sur', bbox='1.2,0,10,10')
+        self.assertEqual(self.codes(body), ['C'])
+        self.assertNotEqual(etag, other_etag)
+        self.assertEqual(self.station_filter.filter(layer='dep', zone='Sur')[1], etag)
+
+    def test_membership_lookup(self):
+        self.membership = zones.compute_membership(self.stations, self.zone_index, layers=('dep',))
+        self.assertEqual(self.membership['dep'].tolist(), ['Norte', 'Sur', 'Sur', None, 'Norte'])
+        bump_zones_version(self.cache_dir)
+
+        # The zone members are looked up, only the stations without zones are tested
+        self.stations.loc[len(self.stations.index)] = ['F', 'F', 0.2, 0.2, 0, 1, '', '', '', '', '', 'R0', 'F']
+        bump_alerts_version(self.cache_dir)
+        with mock.patch.object(self.zone_index, 'get', wraps=self.zone_index.get) as get:
+            body, _ = self.station_filter.filter(layer='dep', zone='Sur')
+            index, _ = self.station_filter.get_index()
+            self.assertEqual(index.unknown.tolist(), [5])
+            self.assertEqual(get.call_count, 1)
+        self.assertEqual(self.codes(body), ['B', 'C', 'F'])
+
+        body, _ = self.station_filter.filter(layer='dep', zone='Norte', bbox='0,0,0.9,10')
+        self.assertEqual(self.codes(body), ['A'])
+
+    def test_invalid_queries(self):
+        for query in [{}, {'layer': 'dep', 'zone': 'Este'}, {'layer': 'basin', 'zone': 'Sur'},
+                      {'bbox': '1,2,3'}, {'bbox': '3,0,1,1'}, {'bbox': 'a,b,c,d'}]:
+            with self.assertRaises(ValueError):
+                self.station_filter.filter(**query)
@@ -0,0 +1,157 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+import struct
+import numpy as np
+import pandas as pd
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Postgres binary COPY header (signature, flags and header extension length) and trailer
+COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+COPY_HEADER = struct.Struct('>11sii')
+COPY_TRAILER = b'\xff\xff'
+
+# Postgres timestamps are microseconds since 2000-01-01 (+-infinity are the int64 limits)
+PG_EPOCH_SECONDS = 946684800
+PG_INFINITY = (np.iinfo(np.int64).min, np.iinfo(np.int64).max)
+
+# Type oids of the date columns and of the value columns that can be sent as float8
+DATE_TYPES = {1082: '{0}::timestamp',                # date
+              1114: '{0}',                           # timestamp
+              1184: "({0} at time zone 'UTC')",      # timestamptz (pandas gives it in UTC)
+              25: '{0}::timestamp',                  # text
+              1043: '{0}::timestamp'}                # varchar
+NUMERIC_TYPES = {20, 21, 23, 700, 701, 1700}
+
+
+
+####################################################################################################
+##                                       DATETIME INDEX                                           ##
+####################################################################################################
+
+def to_datetime_index(microseconds, name='datetime'):
+    '''
+    Naive datetime index truncated to the second from Postgres timestamps (int64 microseconds
+    since 2000-01-01). Same dates the strftime("%Y-%m-%d %H:%M:%S") round trip gave
+    '''
+    microseconds = np.asarray(microseconds, dtype=np.int64)
+    seconds = microseconds // 1000000 + PG_EPOCH_SECONDS
+    dates = seconds.astype('datetime64[s]').astype('datetime64[ns]')
+    dates[np.isin(microseconds, PG_INFINITY)] = np.datetime64('NaT')
+    return pd.DatetimeIndex(dates, name=name)
+
+
+def format_index(data):
+    '''Naive (wall time) datetime index truncated to the second, without formatting strings'''
+    index = pd.DatetimeIndex(pd.to_datetime(data.index))
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    data.index = index.floor('s')
+    return data
+
+
+
+####################################################################################################
+##                                       BINARY COPY READER                                       ##
+####################################################################################################
+
+def copy_statement(sql, columns):
+    '''
+    COPY of a query as a fixed width binary stream (the date and float8 values, nulls sent as
+    -infinity and NaN). columns: [(name, type oid)] of the query. Returns None if a column can
+    not be sent as float8 or if there is no datetime column.
+    '''
+    names = [name for name, _ in columns]
+    types = dict(columns)
+    if names.count('datetime') != 1 or types['datetime'] not in DATE_TYPES:
+        return None
+    if any(type_code not in NUMERIC_TYPES for name, type_code in columns if name != 'datetime'):
+        return None
+
+    def quote(name):
+        return '"{0}"'.format(name.replace('"', '""'))
+
+    fields = ["coalesce({0}, '-infinity')".format(DATE_TYPES[types['datetime']].format(quote('datetime')))]
+    fields += ["coalesce({0}::float8, 'NaN')".format(quote(name)) for name in names if name != 'datetime']
+    return 'copy (select {0} from ({1}) as q) to stdout with (format binary)'.format(', '.join(fields), sql)
+
+
+def record_dtype(value_columns):
+    '''Big endian layout of a tuple of the copy_statement stream'''
+    fields = [('count', '>i2'), ('date_size', '>i4'), ('date', '>i8')]
+    for num in range(value_columns):
+        fields += [('size_{0}'.format(num), '>i4'), ('value_{0}'.format(num), '>f8')]
+    return np.dtype(fields)
+
+
+class BinaryCopyReader:
+    '''
+    File-like target of cursor.copy_expert for a copy_statement stream. The tuples are decoded
+    into datetime64 / float arrays every chunk_rows rows (all at the end if chunk_rows is None),
+    so the raw stream is never held whole in memory when chunks are used.
+    '''
+
+    def __init__(self, columns, dtype=np.float32, chunk_rows=None):
+        self.columns = list(columns)
+        self.dtype = dtype
+        self.record = record_dtype(len(self.columns))
+        self.chunk_size = chunk_rows * self.record.itemsize if chunk_rows else None
+        self._buffer = bytearray()
+        self._header = False
+        self._dates = []
+        self._values = []
+
+    def write(self, data):
+        self._buffer += data
+        if self.chunk_size is not None and len(self._buffer) >= self.chunk_size:
+            self._decode()
+        return len(data)
+
+    def _read_header(self):
+        if len(self._buffer) < COPY_HEADER.size:
+            return False
+        signature, _, extension = COPY_HEADER.unpack_from(self._buffer)
+        if signature != COPY_SIGNATURE:
+            raise ValueError('Not a binary COPY stream')
+        if len(self._buffer) < COPY_HEADER.size + extension:
+            return False
+        del self._buffer[:COPY_HEADER.size + extension]
+        self._header = True
+        return True
+
+    def _decode(self):
+        if not self._header and not self._read_header():
+            return
+        rows = len(self._buffer) // self.record.itemsize
+        if rows == 0:
+            return
+        size = rows * self.record.itemsize
+        records = np.frombuffer(bytes(self._buffer[:size]), dtype=self.record)
+        del self._buffer[:size]
+
+        value_columns = len(self.columns)
+        if (records['count'] != value_columns + 1).any() or (records['date_size'] != 8).any():
+            raise ValueError('Unexpected tuple layout in the COPY stream')
+        values = np.empty((rows, value_columns), dtype=self.dtype)
+        for num in range(value_columns):
+            values[:, num] = records['value_{0}'.format(num)]
+        self._dates.append(records['date'].astype(np.int64))
+        self._values.append(values)
+
+    def result(self):
+        '''Dataframe indexed by date (same layout get_format_data returns)'''
+        self._decode()
+        if not self._header or bytes(self._buffer) != COPY_TRAILER:
+            raise ValueError('Incomplete binary COPY stream')
+        if self._dates:
+            dates = np.concatenate(self._dates)
+            values = np.concatenate(self._values)
+        else:
+            dates = np.array([], dtype=np.int64)
+            values = np.empty((0, len(self.columns)), dtype=self.dtype)
+        return pd.DataFrame(values, index=to_datetime_index(dates), columns=self.columns)
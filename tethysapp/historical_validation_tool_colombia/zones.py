@@ -0,0 +1,216 @@
+####################################################################################################
+##                                   LIBRARIES AND DEPENDENCIES                                   ##
+####################################################################################################
+
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import shape
+
+from . import geometry
+from . import database
+from .cache import CACHE_DIR, get_zones_version
+from .catalog import serialize
+
+
+####################################################################################################
+##                                       STATUS VARIABLES                                         ##
+####################################################################################################
+
+# Zone layers (a zone is a file of the layer, its id is the file name without extension)
+ZONE_LAYERS = geometry.GEOMETRY_LAYERS
+
+
+
+####################################################################################################
+##                                          ZONE INDEX                                            ##
+####################################################################################################
+
+def zone_id(name):
+    return os.path.splitext(name)[0]
+
+
+def load_layer(layer, source_dir=geometry.SOURCE_DIR):
+    '''Zone ids and full resolution polygons (all the features of a file merged) of a layer'''
+    ids = []
+    polygons = []
+    folder = os.path.join(source_dir, layer)
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(folder, name), encoding='utf-8') as f:
+            collection = json.load(f)
+        parts = [shapely.make_valid(shape(f['geometry'])) for f in collection['features'] if f.get('geometry')]
+        ids.append(zone_id(name))
+        polygons.append(shapely.union_all(parts))
+    return ids, np.array(polygons, dtype=object)
+
+
+class ZoneIndex:
+    '''STRtree of the zone polygons of every layer, loaded on first use and shared by the threads'''
+
+    def __init__(self, source_dir=geometry.SOURCE_DIR, layers=ZONE_LAYERS):
+        self.source_dir = source_dir
+        self.layers = layers
+        self._lock = threading.Lock()
+        self._layers = {}
+
+    def _layer(self, layer):
+        if layer not in self.layers:
+            raise ValueError('Unknown zone layer: {0}'.format(layer))
+        if layer not in self._layers:
+            with self._lock:
+                if layer not in self._layers:
+                    ids, polygons = load_layer(layer, self.source_dir)
+                    shapely.prepare(polygons)
+                    self._layers[layer] = (ids, {zone: num for num, zone in enumerate(ids)},
+                                           polygons, shapely.STRtree(polygons))
+        return self._layers[layer]
+
+    def check(self, layer, zone):
+        '''Raises ValueError for unknown layers or zones (without loading the layer)'''
+        if (layer not in self.layers or not zone or zone != os.path.basename(zone) or
+                not os.path.isfile(os.path.join(self.source_dir, layer, zone + '.json'))):
+            raise ValueError('Unknown zone: {0}/{1}'.format(layer, zone))
+
+    def get(self, layer, zone):
+        '''Polygon of a zone. Raises ValueError for unknown layers or zones'''
+        ids, positions, polygons, _ = self._layer(layer)
+        if zone not in positions:
+            raise ValueError('Unknown zone: {0}/{1}'.format(layer, zone))
+        return polygons[positions[zone]]
+
+    def zones_of(self, layer, points):
+        '''Zone id of every point in a layer (None outside all the zones, the first one on borders)'''
+        ids, _, _, tree = self._layer(layer)
+        points = np.asarray(points, dtype=object)
+        result = [None] * len(points)
+        point_positions, zone_positions = tree.query(points, predicate='intersects')
+        for point, zone in sorted(zip(point_positions.tolist(), zone_positions.tolist()), reverse=True):
+            result[point] = ids[zone]
+        return result
+
+
+def compute_membership(stations, zone_index, layers=ZONE_LAYERS):
+    '''
+    Zone of every station in every layer: codigo and one column per layer with the zone id
+    (None outside all the zones). stations needs the codigo, latitude and longitude columns.
+    '''
+    points = shapely.points(stations[['longitude', 'latitude']].to_numpy(dtype=float))
+    membership = pd.DataFrame({'codigo': stations['codigo'].astype(str).to_numpy()})
+    for layer in layers:
+        membership[layer] = zone_index.zones_of(layer, points)
+    return membership
+
+
+
+####################################################################################################
+##                                         STATION INDEX                                          ##
+####################################################################################################
+
+def parse_bbox(value):
+    '''Bounding box "min_lon,min_lat,max_lon,max_lat". Raises ValueError if it is not valid'''
+    bbox = [float(v) for v in value.split(',')]
+    if len(bbox) != 4 or not all(np.isfinite(bbox)) or bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+        raise ValueError('Invalid bounding box: {0}'.format(value))
+    return bbox
+
+
+class StationIndex:
+    '''
+    STRtree of the station points of a catalog (GeoJSON built by catalog.build_catalog) and, if
+    the zones of the stations were computed, the stations of every zone of every layer
+    '''
+
+    def __init__(self, data, membership=None):
+        self.features = data['features']
+        coordinates = np.array([f['geometry']['coordinates'] for f in self.features], dtype=float).reshape(-1, 2)
+        self.points = shapely.points(coordinates)
+        self.tree = shapely.STRtree(self.points)
+
+        # {layer: {zone: positions}} and positions of the stations without computed zones
+        self.members = {}
+        self.unknown = np.arange(len(self.features))
+        if membership is not None:
+            codes = pd.Series([f['properties']['code'] for f in self.features])
+            membership = membership.assign(codigo=membership['codigo'].astype(str)).drop_duplicates('codigo')
+            rows = membership.set_index('codigo').reindex(codes)
+            known = rows.index.isin(membership['codigo'])
+            self.unknown = np.flatnonzero(~known)
+            for layer in rows.columns:
+                zones = rows[layer].to_numpy()
+                self.members[layer] = {zone: np.flatnonzero(known & (zones == zone))
+                                       for zone in pd.unique(zones[known]) if isinstance(zone, str)}
+
+    def query(self, area, positions=None):
+        '''
+        Positions (in catalog order) of the stations inside or on the border of an area. Only
+        the given positions are tested if positions is not None
+        '''
+        if positions is None:
+            return np.sort(self.tree.query(area, predicate='intersects'))
+        return positions[shapely.intersects(area, self.points[positions])]
+
+    def zone_members(self, layer, zone, zone_index):
+        '''
+        Positions of the stations of a zone. The computed zones are an O(1) lookup, only the
+        stations without computed zones are tested against the polygon
+        '''
+        if layer not in self.members:
+            return self.query(zone_index.get(layer, zone))
+        positions = self.members[layer].get(zone, np.array([], dtype=int))
+        if len(self.unknown) > 0:
+            positions = np.union1d(positions, self.query(zone_index.get(layer, zone), self.unknown))
+        return positions
+
+    def select(self, positions):
+        return {'type': 'FeatureCollection', 'features': [self.features[num] for num in positions]}
+
+
+class StationFilter:
+    '''
+    Stations of a zone and/or a bounding box. The index of the stations is rebuilt with the
+    catalog and with the zones of the stations (stations_zones table, manage.py compute_zones).
+    The results are served as JSON bytes with a strong ETag (catalog, zones and query).
+    '''
+
+    def __init__(self, catalog, zones, load_membership=database.get_station_zones, cache_dir=CACHE_DIR):
+        self.catalog = catalog
+        self.zones = zones
+        self.load_membership = load_membership
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._index = (None, None)
+
+    def get_index(self):
+        '''Index of the current catalog and zones, and its key (catalog ETag, zones version)'''
+        _, etag, data = self.catalog.get_catalog()
+        key = (etag, get_zones_version(self.cache_dir))
+        if self._index[0] != key:
+            with self._lock:
+                if self._index[0] != key:
+                    self._index = (key, StationIndex(data, self.load_membership()))
+        key, index = self._index
+        return index, key
+
+    def filter(self, layer=None, zone=None, bbox=None):
+        '''Return the GeoJSON (bytes) of the matching stations and its ETag'''
+        if not (layer or zone or bbox):
+            raise ValueError('A zone or a bounding box is required')
+        if layer or zone:
+            self.zones.check(layer, zone)
+        bbox = parse_bbox(bbox) if bbox else None
+
+        index, (catalog_etag, zones_version) = self.get_index()
+        if layer or zone:
+            positions = index.zone_members(layer, zone, self.zones)
+            if bbox:
+                positions = index.query(shapely.box(*bbox), positions)
+        else:
+            positions = index.query(shapely.box(*bbox))
+        query = hashlib.sha1(repr((zones_version, layer, zone, bbox)).encode('utf-8')).hexdigest()[:12]
+        return serialize(index.select(positions)), '"{0}-{1}"'.format(catalog_etag.strip('"'), query)